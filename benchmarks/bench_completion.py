@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bash 补全延迟基准测试
+
+生成含大量主机的补全缓存，在 bash 中直接调用 _xssh_complete 并用
+$EPOCHREALTIME 计时，分别测量使用 look 二分查找（如已安装）和 grep + awk
+前缀过滤时，不同前缀下单次补全的耗时。
+
+用法: python benchmarks/bench_completion.py [--hosts 数量] [-n 次数]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from xssh.cli import SUBCOMMANDS  # noqa: E402
+from xssh.completion import CompletionCache  # noqa: E402
+from xssh.models import HostInfo  # noqa: E402
+
+# (说明, 前缀)
+PREFIXES = [
+    ("唯一匹配", "root@host05000"),
+    ("约 100 条", "root@host050"),
+    ("约 1 万条", "root@host0"),
+]
+
+DRIVER = r"""
+eval "$SCRIPT"
+COMP_WORDS=(xssh connect "$PREFIX")
+COMP_CWORD=2
+for ((i = 0; i < N; i++)); do
+    start=$EPOCHREALTIME
+    _xssh_complete
+    end=$EPOCHREALTIME
+    echo "${#COMPREPLY[@]} $start $end"
+done
+"""
+
+
+def make_cache(directory: Path, count: int) -> Path:
+    csv_path = directory / "hosts.csv"
+    csv_path.write_text("host,port,user,password\n", encoding="utf-8")
+    cache = CompletionCache(csv_path)
+    cache.write(HostInfo(f"host{i:05d}", 22, "root", "x") for i in range(count))
+    # 补全缓存必须比 CSV 新，否则补全时会调用 xssh 重建
+    os.utime(csv_path, (0, 0))
+    return cache.path
+
+
+def path_without_look(directory: Path) -> str:
+    """只包含 grep 和 awk 的 PATH，使补全脚本走 grep + awk 回退分支"""
+    bin_dir = directory / "bin"
+    bin_dir.mkdir()
+    for name in ("grep", "awk"):
+        (bin_dir / name).symlink_to(shutil.which(name))
+    return str(bin_dir)
+
+
+def bench(cache: Path, prefix: str, count: int, path: str):
+    env = dict(
+        os.environ,
+        PATH=path,
+        SCRIPT=CompletionCache.script("bash", SUBCOMMANDS),
+        PREFIX=prefix,
+        N=str(count),
+        XSSH_COMPLETION_CACHE=str(cache),
+    )
+    output = subprocess.run(
+        [shutil.which("bash"), "--norc", "--noprofile", "-c", DRIVER],
+        env=env, stdout=subprocess.PIPE, check=True, universal_newlines=True,
+    ).stdout
+    samples = []
+    matches = 0
+    for line in output.splitlines():
+        matches, start, end = line.split()
+        samples.append((float(end) - float(start)) * 1000)
+    return int(matches), samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bash 补全延迟基准测试")
+    parser.add_argument("--hosts", type=int, default=100000, help="主机数量（默认: 100000）")
+    parser.add_argument("-n", type=int, default=20, help="每个前缀的补全次数（默认: 20）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = make_cache(tmp, args.hosts)
+        print(f"补全缓存: {args.hosts} 台主机，{cache.stat().st_size} 字节\n")
+
+        variants = []
+        if shutil.which("look"):
+            variants.append(("look", os.environ.get("PATH", "")))
+        else:
+            print("look 未安装，跳过二分查找的测试\n")
+        variants.append(("grep", path_without_look(tmp)))
+
+        for name, path in variants:
+            for label, prefix in PREFIXES:
+                matches, samples = bench(cache, prefix, args.n, path)
+                print(
+                    f"{name:<5} {label:<10} {matches:>6} 条  "
+                    f"中位数 {statistics.median(samples):7.1f} ms   最大 {max(samples):7.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
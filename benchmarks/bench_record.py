@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话录制开销基准测试
+
+测量单个按键从写入到回显的延迟（伪终端行规程回显），对比三种情况：
+直接读写伪终端、经由 PtyRelay 转发、经由 PtyRelay 转发并录制。
+
+用法: python benchmarks/bench_record.py [-n 次数]
+"""
+
+import argparse
+import os
+import pty
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from xssh.recorder import CastWriter, PtyRelay  # noqa: E402
+
+
+def _roundtrip(write_fd, read_fd, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        os.write(write_fd, b"x")
+        os.read(read_fd, 1)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_direct(count):
+    master, slave = pty.openpty()
+    process = subprocess.Popen(["cat"], stdin=slave, stdout=slave, stderr=slave)
+    os.close(slave)
+    try:
+        return _roundtrip(master, master, count)
+    finally:
+        os.write(master, b"\n\x04")
+        process.wait()
+        os.close(master)
+
+
+def bench_relay(count, record):
+    in_r, in_w = os.pipe()
+    out_r, out_w = os.pipe()
+    samples = []
+
+    def drive():
+        samples.extend(_roundtrip(in_w, out_r, count))
+        os.write(in_w, b"\n\x04")
+        os.close(in_w)
+        # 排空剩余输出，避免转发端阻塞
+        while os.read(out_r, 65536):
+            pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = CastWriter(Path(tmp) / "bench.cast") if record else None
+        thread = threading.Thread(target=drive)
+        thread.start()
+        # PtyRelay 需要在主线程中安装 SIGWINCH 处理器
+        PtyRelay(["cat"], writer, stdin_fd=in_r, stdout_fd=out_w).run()
+        os.close(out_w)
+        thread.join()
+    os.close(in_r)
+    os.close(out_r)
+    return samples
+
+
+def report(name, samples, baseline=None):
+    samples = sorted(samples)
+    median = statistics.median(samples) * 1e6
+    p99 = samples[int(len(samples) * 0.99) - 1] * 1e6
+    line = f"{name:<12} 中位数 {median:8.1f} µs   p99 {p99:8.1f} µs"
+    if baseline is not None:
+        line += f"   开销 {median - baseline:+8.1f} µs"
+    print(line)
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser(description="会话录制开销基准测试")
+    parser.add_argument("-n", type=int, default=5000, help="按键次数（默认: 5000）")
+    args = parser.parse_args()
+
+    direct = report("直接", bench_direct(args.n))
+    relay = report("转发", bench_relay(args.n, record=False), direct)
+    report("转发+录制", bench_relay(args.n, record=True), relay)
+
+
+if __name__ == "__main__":
+    main()
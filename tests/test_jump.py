@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跳板机解析与复用连接测试
+
+不需要真实的 sshd：ssh / sshpass 调用通过替换 subprocess 记录下来。
+"""
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from xssh import jump, tunnel
+from xssh.exceptions import JumpHostError
+from xssh.hosts_manager import HostsManager
+from xssh.jump import ControlMaster, JumpChain, JumpResolver
+
+
+def make_manager(tmp_path, rows):
+    csv_path = tmp_path / "hosts.csv"
+    lines = ["host,port,user,password,jump"] + [",".join(row) for row in rows]
+    csv_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    manager = HostsManager(csv_path)
+    manager.load()
+    return manager
+
+
+def test_chain_expands_nested_jumps_outermost_first(tmp_path):
+    manager = make_manager(tmp_path, [
+        ("edge", "22", "ops", "p1", ""),
+        ("bastion", "22", "ops", "p2", "ops@edge"),
+        ("db01", "22", "root", "p3", "ops@bastion"),
+    ])
+    target = manager.find_by_host_user("db01", "root")
+
+    hops = JumpResolver(manager).chain(target)
+
+    assert [h.key for h in hops] == ["ops@edge", "ops@bastion"]
+
+
+def test_chain_applies_port_override(tmp_path):
+    manager = make_manager(tmp_path, [
+        ("bastion", "22", "ops", "p1", ""),
+        ("db01", "22", "root", "p2", "ops@bastion:2222"),
+    ])
+
+    hops = JumpResolver(manager).chain(manager.find_by_host_user("db01", "root"))
+
+    assert [(h.key, h.port) for h in hops] == [("ops@bastion", 2222)]
+    # 清单中的原记录不受影响
+    assert manager.find_by_host_user("bastion", "ops").port == 22
+
+
+def test_chain_detects_cycles(tmp_path):
+    manager = make_manager(tmp_path, [
+        ("a", "22", "ops", "p1", "ops@b"),
+        ("b", "22", "ops", "p2", "ops@a"),
+        ("db01", "22", "root", "p3", "ops@a"),
+    ])
+
+    with pytest.raises(JumpHostError, match="循环引用"):
+        JumpResolver(manager).chain(manager.find_by_host_user("db01", "root"))
+
+
+def test_chain_rejects_unknown_and_ambiguous_hops(tmp_path):
+    manager = make_manager(tmp_path, [
+        ("bastion", "22", "ops", "p1", ""),
+        ("bastion", "22", "admin", "p2", ""),
+        ("db01", "22", "root", "p3", "missing"),
+        ("db02", "22", "root", "p4", "bastion"),
+    ])
+    resolver = JumpResolver(manager)
+
+    with pytest.raises(JumpHostError, match="不在清单中"):
+        resolver.chain(manager.find_by_host_user("db01", "root"))
+    with pytest.raises(JumpHostError, match="多个用户"):
+        resolver.chain(manager.find_by_host_user("db02", "root"))
+
+
+class FakeSSH:
+    """记录 ssh / sshpass 调用，-O check 的结果由 alive 决定"""
+
+    def __init__(self, master, alive=False):
+        self.master = master
+        self.alive = alive
+        self.calls = []
+
+    def run(self, cmd, **kwargs):
+        self.calls.append(cmd)
+        if "-O" in cmd:
+            return subprocess.CompletedProcess(cmd, 0 if self.alive else 255)
+        if cmd[0] == "sshpass":
+            # 启动新的 master 时残留的 socket 必须已被删除
+            path = next(o.split("=", 1)[1] for o in cmd if o.startswith("ControlPath="))
+            assert not Path(path).exists()
+        return subprocess.CompletedProcess(cmd, 0)
+
+    def masters(self):
+        return [c for c in self.calls if c[0] == "sshpass"]
+
+
+def test_ensure_removes_stale_socket_before_starting_master(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, [("bastion", "22", "ops", "p1", "")])
+    hop = manager.find_by_host_user("bastion", "ops")
+    master = ControlMaster(tmp_path / "mux")
+    master.control_dir.mkdir()
+    master.control_path(hop).write_text("")  # 上一个 master 异常退出留下的文件
+    fake = FakeSSH(master, alive=False)
+    monkeypatch.setattr(jump.subprocess, "run", fake.run)
+
+    master.ensure(hop, None, lambda h: h)
+
+    assert len(fake.masters()) == 1
+    assert "ControlMaster=yes" in fake.masters()[0]
+
+
+def test_ensure_reuses_live_master(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, [("bastion", "22", "ops", "p1", "")])
+    hop = manager.find_by_host_user("bastion", "ops")
+    master = ControlMaster(tmp_path / "mux")
+    master.control_dir.mkdir()
+    master.control_path(hop).write_text("")
+    fake = FakeSSH(master, alive=True)
+    monkeypatch.setattr(jump.subprocess, "run", fake.run)
+
+    master.ensure(hop, None, lambda h: pytest.fail("复用连接时不应解密密码"))
+
+    assert fake.masters() == []
+    assert master.control_path(hop).exists()
+
+
+def test_prepare_chains_masters_through_upstream(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, [
+        ("edge", "22", "ops", "p1", ""),
+        ("bastion", "2200", "ops", "p2", "ops@edge"),
+        ("db01", "22", "root", "p3", "ops@bastion"),
+    ])
+    master = ControlMaster(tmp_path / "mux")
+    fake = FakeSSH(master)
+    monkeypatch.setattr(jump.subprocess, "run", fake.run)
+
+    proxy = JumpChain(manager, lambda h: h, master).prepare(
+        manager.find_by_host_user("db01", "root")
+    )
+
+    first, second = fake.masters()
+    assert first[-1] == "ops@edge"
+    assert not any(o.startswith("ProxyCommand=") for o in first)
+    assert second[-1] == "ops@bastion"
+    assert f"ProxyCommand={master.proxy_command(manager.find_by_host_user('edge', 'ops'))}" in second
+    assert proxy == master.proxy_command(manager.find_by_host_user("bastion", "ops"))
+
+
+def test_tunnel_group_removes_stale_socket_before_start(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    manager = make_manager(tmp_path, [("db01", "22", "root", "p1", "")])
+    group = tunnel.TunnelGroup(
+        manager.find_by_host_user("db01", "root"), [], JumpChain(manager, lambda h: h)
+    )
+    group.control_path.parent.mkdir(parents=True)
+    group.control_path.write_text("")
+    started = []
+
+    def fake_popen(cmd, **kwargs):
+        assert not group.control_path.exists()
+        started.append(cmd)
+        return object()
+
+    monkeypatch.setattr(tunnel.subprocess, "Popen", fake_popen)
+
+    group.start()
+
+    assert group.status == "up"
+    assert len(started) == 1
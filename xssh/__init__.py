@@ -6,3 +6,23 @@ xssh - 基于 CSV 的 SSH 密码快速连接工具
 
 __version__ = "1.0.0"
 __author__ = "xssh"
+
+# asyncio 接口按需导入，避免拖慢命令行启动
+_AIO_EXPORTS = (
+    "run",
+    "stream",
+    "AsyncClient",
+    "AsyncInventory",
+    "RunResult",
+    "OutputLine",
+)
+
+__all__ = list(_AIO_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _AIO_EXPORTS:
+        from xssh import aio
+
+        return getattr(aio, name)
+    raise AttributeError(f"module 'xssh' has no attribute {name!r}")
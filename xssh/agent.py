@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+主密码缓存代理
+
+类似 ssh-agent：后台进程通过 Unix socket 在内存中保存主密码，并按 salt
+缓存派生出的密钥，在有效期内后续的 xssh 调用无需再次输入主密码，也无需
+重复执行 PBKDF2。代理是可选的，不可用时客户端静默回退为交互输入。
+"""
+
+import base64
+import json
+import os
+import signal
+import socket
+import socketserver
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from xssh import daemon
+from xssh.exceptions import AgentError, XSSHError
+
+DEFAULT_TTL = 3600
+
+
+def socket_path() -> Path:
+    """代理 socket 路径（可通过 XSSH_AGENT_SOCK 覆盖）"""
+    env = os.environ.get("XSSH_AGENT_SOCK")
+    if env:
+        return Path(env)
+    return Path.home() / ".ssh" / "xssh-agent.sock"
+
+
+class AgentClient:
+    """代理客户端"""
+
+    TIMEOUT = 2.0
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or socket_path()
+
+    def _request(self, payload: dict) -> Optional[dict]:
+        if not hasattr(socket, "AF_UNIX") or not self.path.exists():
+            return None
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.TIMEOUT)
+                sock.connect(str(self.path))
+                sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+                data = b""
+                while not data.endswith(b"\n"):
+                    chunk = sock.recv(4096)
+                    if not chunk:
+                        break
+                    data += chunk
+            return json.loads(data.decode("utf-8")) if data else None
+        except (OSError, ValueError):
+            return None
+
+    def get_key(self, salt: bytes) -> Optional[bytes]:
+        """获取 salt 对应的密钥，代理不可用或未缓存主密码时返回 None"""
+        resp = self._request(
+            {"op": "key", "salt": base64.urlsafe_b64encode(salt).decode("ascii")}
+        )
+        if not resp or "key" not in resp:
+            return None
+        return resp["key"].encode("ascii")
+
+    def set_passphrase(self, passphrase: str):
+        """将主密码交给代理缓存"""
+        self._request({"op": "set", "passphrase": passphrase})
+
+    def clear(self):
+        """清除代理缓存的主密码"""
+        self._request({"op": "clear"})
+
+    def status(self) -> Optional[dict]:
+        """查询代理状态"""
+        return self._request({"op": "status"})
+
+    def stop(self) -> bool:
+        """停止代理"""
+        return self._request({"op": "stop"}) is not None
+
+
+class _AgentHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+            response = self.server.dispatch(request)
+        except (ValueError, KeyError, TypeError) as e:
+            response = {"error": str(e)}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class KeyAgent(socketserver.UnixStreamServer):
+    """主密码缓存代理服务端"""
+
+    def __init__(self, path: Path, ttl: int = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.running = True
+        self._passphrase: Optional[str] = None
+        self._expires_at = 0.0
+        self._keys: Dict[str, str] = {}
+        super().__init__(str(path), _AgentHandler)
+        os.chmod(str(path), 0o600)
+        self.timeout = 1.0
+
+    def _expire(self):
+        if self._passphrase is not None and time.monotonic() >= self._expires_at:
+            self._passphrase = None
+            self._keys.clear()
+
+    def dispatch(self, request: dict) -> dict:
+        from xssh.crypto import derive_key
+
+        self._expire()
+        op = request["op"]
+
+        if op == "set":
+            self._passphrase = request["passphrase"]
+            self._expires_at = time.monotonic() + self.ttl
+            self._keys.clear()
+            return {"ok": True}
+
+        if op == "clear":
+            self._passphrase = None
+            self._keys.clear()
+            return {"ok": True}
+
+        if op == "key":
+            if self._passphrase is None:
+                return {"error": "locked"}
+            salt = request["salt"]
+            if salt not in self._keys:
+                raw = base64.urlsafe_b64decode(salt.encode("ascii"))
+                self._keys[salt] = derive_key(self._passphrase, raw).decode("ascii")
+            return {"key": self._keys[salt]}
+
+        if op == "status":
+            remaining = max(0, int(self._expires_at - time.monotonic()))
+            return {
+                "pid": os.getpid(),
+                "unlocked": self._passphrase is not None,
+                "ttl": remaining if self._passphrase is not None else 0,
+            }
+
+        if op == "stop":
+            self.running = False
+            return {"ok": True}
+
+        return {"error": f"unknown op: {op}"}
+
+    def serve(self):
+        try:
+            while self.running:
+                self.handle_request()
+                self._expire()
+        finally:
+            self.server_close()
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+def start_agent(ttl: int = DEFAULT_TTL, foreground: bool = False) -> int:
+    """启动代理，返回代理进程 pid"""
+    if not hasattr(socket, "AF_UNIX"):
+        raise AgentError("当前平台不支持 Unix socket，无法启动代理")
+
+    path = socket_path()
+    client = AgentClient(path)
+    status = client.status()
+    if status:
+        raise AgentError(f"代理已在运行 (pid {status['pid']}): {path}")
+
+    # 清理残留的 socket 文件
+    if path.exists():
+        path.unlink()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if foreground:
+        agent = KeyAgent(path, ttl)
+        signal.signal(signal.SIGTERM, lambda *_: setattr(agent, "running", False))
+        agent.serve()
+        return os.getpid()
+
+    def main(ready):
+        agent = KeyAgent(path, ttl)
+        signal.signal(signal.SIGTERM, lambda *_: setattr(agent, "running", False))
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        ready()
+        agent.serve()
+
+    try:
+        return daemon.spawn(main)
+    except XSSHError:
+        raise AgentError("代理启动失败")
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+asyncio 编程接口
+
+供编排脚本在 Python 中直接调用 xssh：
+
+    import xssh
+
+    async for result in xssh.run(["root@web1", "db01"], "uptime"):
+        print(result.host, result.returncode, result.stdout)
+
+    results = await xssh.run(targets, "uptime")      # 全部完成后返回列表
+
+    async for item in xssh.stream(targets, "tail -n 100 /var/log/app.log"):
+        if isinstance(item, xssh.OutputLine):
+            print(item.host, item.text)
+
+所有错误都以 XSSHError 子类的形式抛出，不会退出进程。目标解析错误（主机
+不存在、需要选择用户等）在开始执行前抛出；单台主机的执行失败（超时、
+连接失败、非零退出码、无法输入主密码、stream() 中单行超过 LINE_LIMIT）
+记录在该主机的 RunResult 中，可调用 check() 抛出。
+
+远程命令通过 asyncio.create_subprocess_exec 执行，并发数由信号量限制；
+清单加载、跳板机连接和密码解密等阻塞操作在线程池中执行。取消正在迭代
+的任务会终止所有仍在运行的 ssh 进程；提前退出 async for 时进程在迭代器
+被回收时终止，需要立即终止时调用迭代器的 aclose()。
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Iterable, List, Optional, Union
+
+from xssh.models import HostInfo
+from xssh.parser import TargetParser
+from xssh.inventory import Inventory
+from xssh.finder import HostFinder
+from xssh.resolver import Canonicalizer
+from xssh.crypto import PasswordVault
+from xssh.jump import JumpChain
+from xssh.ssh import SSHClient
+from xssh.exceptions import (
+    CommandTimeoutError,
+    RemoteCommandError,
+    SSHConnectionError,
+    SSHPassNotFoundError,
+    XSSHError,
+)
+
+DEFAULT_JOBS = 16
+TERMINATE_GRACE = 2
+LINE_LIMIT = 1 << 20
+
+Target = Union[str, HostInfo]
+
+
+@dataclass
+class RunResult:
+    """单台主机的执行结果"""
+
+    host: HostInfo
+    returncode: Optional[int]
+    stdout: str = ""
+    stderr: str = ""
+    elapsed: float = 0.0
+    error: Optional[XSSHError] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.returncode == 0
+
+    def check(self) -> "RunResult":
+        """执行失败时抛出异常，成功时返回自身"""
+        if self.error is not None:
+            raise self.error
+        if self.returncode != 0:
+            raise RemoteCommandError(
+                f"{self.host}: 命令退出码 {self.returncode}", self.returncode
+            )
+        return self
+
+
+@dataclass
+class OutputLine:
+    """stream() 输出的一行（不含换行符）"""
+
+    host: HostInfo
+    stream: str  # "stdout" 或 "stderr"
+    text: str
+
+
+class ResultStream:
+    """
+    run() 的返回值
+
+    既可以 async for 按完成顺序逐个获取结果，也可以直接 await 得到结果列表。
+    """
+
+    def __init__(self, agen):
+        self._agen = agen
+
+    def __aiter__(self):
+        return self._agen
+
+    def __await__(self):
+        return self._collect().__await__()
+
+    async def aclose(self):
+        """终止仍在运行的 ssh 进程"""
+        await self._agen.aclose()
+
+    async def _collect(self) -> List[RunResult]:
+        return [result async for result in self._agen]
+
+
+async def _in_thread(func, *args):
+    """在默认线程池中执行阻塞调用（兼容 Python 3.8）"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+class AsyncInventory:
+    """HostsManager / Inventory 的异步封装"""
+
+    def __init__(self, config=None, resolve: bool = False):
+        self.inventory = Inventory(config)
+        self.resolve = resolve
+        self._finder: Optional[HostFinder] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def load(self) -> HostFinder:
+        """加载清单（只加载一次）"""
+        if self._finder is not None:
+            return self._finder
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._finder is None:
+                await _in_thread(self.inventory.load)
+                canonicalizer = Canonicalizer(self.inventory) if self.resolve else None
+                self._finder = HostFinder(self.inventory, canonicalizer)
+        return self._finder
+
+    async def reload(self):
+        """重新加载清单"""
+        self._finder = None
+        await self.load()
+
+    async def find(self, target: Target) -> HostInfo:
+        """
+        把 user@host[:port] 或 host 解析为清单记录（端口已按目标覆盖）
+
+        主机有多个用户且未指定用户时抛出 MultipleUsersError（其 hosts 属性为候选记录）。
+        """
+        if isinstance(target, HostInfo):
+            return target
+        finder = await self.load()
+        host_info, port = await _in_thread(finder.find, TargetParser.parse(target))
+        return host_info if port == host_info.port else replace(host_info, port=port)
+
+    async def find_all(self, targets: Iterable[Target]) -> List[HostInfo]:
+        return [await self.find(t) for t in targets]
+
+    async def find_by_host(self, host: str) -> List[HostInfo]:
+        await self.load()
+        return self.inventory.find_by_host(host) or []
+
+    async def find_by_host_user(self, host: str, user: str) -> Optional[HostInfo]:
+        await self.load()
+        return self.inventory.find_by_host_user(host, user)
+
+    async def hosts(self) -> List[HostInfo]:
+        """清单中的所有记录"""
+        await self.load()
+        return list(self.inventory.iter_hosts())
+
+
+class AsyncClient:
+    """异步批量执行远程命令"""
+
+    def __init__(
+        self,
+        config=None,
+        resolve: bool = False,
+        jobs: int = DEFAULT_JOBS,
+        timeout: Optional[float] = None,
+        vault: Optional[PasswordVault] = None,
+    ):
+        self.inventory = AsyncInventory(config, resolve)
+        self.jobs = jobs
+        self.timeout = timeout
+        self.vault = vault or PasswordVault()
+
+        # 解密可能需要交互输入主密码，串行化避免多个线程同时提示
+        lock = threading.Lock()
+
+        def locked_reveal(host_info):
+            with lock:
+                return self.vault.reveal(host_info)
+
+        self._reveal = locked_reveal
+        self._jump = JumpChain(self.inventory.inventory, locked_reveal)
+
+    def _build_command(self, host_info: HostInfo, command: str) -> List[str]:
+        proxy_command = self._jump.prepare(host_info)
+        client = SSHClient(self._reveal(host_info), host_info.port, proxy_command)
+        return client._build_ssh_command(command)
+
+    async def _targets(self, targets) -> List[HostInfo]:
+        if isinstance(targets, (str, HostInfo)):
+            targets = [targets]
+        return await self.inventory.find_all(targets)
+
+    @staticmethod
+    async def _terminate(process):
+        """先 SIGTERM（sshpass 会转发给 ssh），超时后 SIGKILL"""
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), TERMINATE_GRACE)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    async def _read(reader, host_info, name, queue):
+        if queue is None:
+            return (await reader.read()).decode("utf-8", "replace")
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # 单行超过 StreamReader 的 limit
+                raise XSSHError(f"{host_info}: {name} 单行输出超过 {LINE_LIMIT} 字节")
+            if not line:
+                return ""
+            text = line.decode("utf-8", "replace").rstrip("\r\n")
+            await queue.put(OutputLine(host_info, name, text))
+
+    async def _execute(
+        self, host_info: HostInfo, command: str, timeout: Optional[float], queue=None
+    ) -> RunResult:
+        """在一台主机上执行命令，queue 不为空时逐行输出到 queue"""
+        start = time.monotonic()
+        try:
+            cmd = await _in_thread(self._build_command, host_info, command)
+        except XSSHError as e:
+            return RunResult(host_info, None, error=e)
+        except EOFError:
+            # 需要输入主密码但没有可用的终端
+            return RunResult(
+                host_info, None, error=XSSHError(f"{host_info}: 无法读取主密码（输入已关闭）")
+            )
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=LINE_LIMIT,
+            )
+        except FileNotFoundError:
+            raise SSHPassNotFoundError("sshpass 未找到，请先安装 sshpass")
+        except OSError as e:
+            raise XSSHError(f"无法执行 SSH 命令: {e}")
+
+        async def communicate():
+            readers = [
+                asyncio.ensure_future(self._read(process.stdout, host_info, "stdout", queue)),
+                asyncio.ensure_future(self._read(process.stderr, host_info, "stderr", queue)),
+            ]
+            try:
+                stdout, stderr = await asyncio.gather(*readers)
+            finally:
+                # 一个读取出错时不再读取另一个
+                for reader in readers:
+                    reader.cancel()
+            return stdout, stderr, await process.wait()
+
+        try:
+            stdout, stderr, returncode = await asyncio.wait_for(communicate(), timeout)
+        except asyncio.TimeoutError:
+            await self._terminate(process)
+            return RunResult(
+                host_info,
+                None,
+                elapsed=time.monotonic() - start,
+                error=CommandTimeoutError(f"{host_info}: 执行超时 ({timeout} 秒)"),
+            )
+        except XSSHError as e:
+            await self._terminate(process)
+            return RunResult(host_info, None, elapsed=time.monotonic() - start, error=e)
+        except asyncio.CancelledError:
+            await self._terminate(process)
+            raise
+
+        result = RunResult(host_info, returncode, stdout, stderr, time.monotonic() - start)
+        if returncode == 255:
+            # ssh 自身出错（连接失败、认证失败等）时退出码为 255
+            detail = stderr.strip().splitlines()
+            result.error = SSHConnectionError(
+                f"{host_info}: 连接失败" + (f": {detail[-1]}" if detail else "")
+            )
+        return result
+
+    async def _run(self, targets, command, timeout, queue=None) -> AsyncIterator[RunResult]:
+        hosts = await self._targets(targets)
+        if not hosts:
+            return
+        timeout = self.timeout if timeout is None else timeout
+        semaphore = asyncio.Semaphore(self.jobs)
+
+        async def bounded(host_info):
+            async with semaphore:
+                return await self._execute(host_info, command, timeout, queue)
+
+        tasks = [asyncio.ensure_future(bounded(h)) for h in hosts]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            # 提前退出或被取消时终止仍在运行的 ssh 进程
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def run(
+        self, targets, command: str, timeout: Optional[float] = None
+    ) -> ResultStream:
+        """
+        在多台主机上执行命令
+
+        返回值可 async for 按完成顺序获取 RunResult，也可 await 得到列表。
+        """
+        return ResultStream(self._run(targets, command, timeout))
+
+    async def stream(
+        self, targets, command: str, timeout: Optional[float] = None
+    ) -> AsyncIterator[Union[OutputLine, RunResult]]:
+        """
+        在多台主机上执行命令并逐行返回输出
+
+        每行输出产生一个 OutputLine；一台主机执行结束时产生该主机的 RunResult
+        （其 stdout/stderr 为空）。
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1024)
+        done = object()
+
+        async def produce():
+            results = self._run(targets, command, timeout, queue)
+            try:
+                async for result in results:
+                    await queue.put(result)
+            finally:
+                await results.aclose()
+                await queue.put(done)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                yield item
+            # 传播目标解析等错误
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+
+def run(
+    targets,
+    command: str,
+    *,
+    config=None,
+    jobs: int = DEFAULT_JOBS,
+    timeout: Optional[float] = None,
+    vault: Optional[PasswordVault] = None,
+) -> ResultStream:
+    """使用默认清单在多台主机上执行命令，参见 AsyncClient.run"""
+    return AsyncClient(config, jobs=jobs, vault=vault).run(targets, command, timeout)
+
+
+def stream(
+    targets,
+    command: str,
+    *,
+    config=None,
+    jobs: int = DEFAULT_JOBS,
+    timeout: Optional[float] = None,
+    vault: Optional[PasswordVault] = None,
+) -> AsyncIterator[Union[OutputLine, RunResult]]:
+    """使用默认清单在多台主机上执行命令并逐行返回输出，参见 AsyncClient.stream"""
+    return AsyncClient(config, jobs=jobs, vault=vault).stream(targets, command, timeout)
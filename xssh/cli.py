@@ -4,23 +4,68 @@
 xssh CLI 入口
 """
 
+import os
 import sys
+import json
 import argparse
 import getpass
 from pathlib import Path
 
 from xssh.core import XSSH
+from xssh.completion import CompletionCache
+from xssh.crypto import PasswordVault
+from xssh.sync import compare, sync_file, format_diff
+from xssh import resolver
+from xssh import facts as facts_mod
+from xssh.finder import HostFinder, MultipleUsersError
+from xssh import agent
+from xssh import tunnel
 from xssh.hosts_manager import HostsManager
+from xssh.inventory import Inventory
 from xssh.parser import TargetParser
+from xssh.exceptions import UserNotFoundError
+
+# -i 参数说明
+CONFIG_HELP = (
+    "指定配置文件或目录，可多次指定，靠前的优先"
+    "（默认: $XSSH_HOSTS、~/.ssh/hosts.csv、~/.ssh/hosts.d/*.csv）"
+)
+
+# -r 参数说明
+RESOLVE_HELP = "精确匹配失败时按主机名/IP 解析结果匹配（也可设置 XSSH_RESOLVE=1）"
+
+# --record 参数说明
+RECORD_HELP = "把会话输出录制为 asciicast v2 文件，可用 xssh replay 回放"
 
 # 子命令列表
-SUBCOMMANDS = ["add", "delete", "show", "connect"]
+SUBCOMMANDS = ["add", "delete", "show", "connect", "completion", "encrypt", "agent", "diff", "sync", "resolve", "facts", "tunnel", "replay"]
+
+
+def get_inventory(args):
+    """根据 -i 参数获取多来源 Inventory 实例"""
+    config = args.config if hasattr(args, "config") and args.config else None
+    return Inventory(config)
 
 
 def get_hosts_manager(args):
-    """根据 -i 参数获取 HostsManager 实例"""
-    csv_path = Path(args.config) if hasattr(args, "config") and args.config else None
-    return HostsManager(csv_path)
+    """根据 -i 参数获取写操作目标文件的 HostsManager 实例（第一个 -i 或默认文件）"""
+    return HostsManager(get_inventory(args).primary_path)
+
+
+def encrypt_for(manager, vault):
+    """文件中已有密文时先用输入的主密码解密一条，保证新密文使用同一个主密码"""
+    existing = manager.find_encrypted_password()
+    if existing is not None:
+        vault.adopt(existing)
+    return vault
+
+
+def format_host(h):
+    """show 命令中的单行显示"""
+    text = f"{h.user}@{h.host}:{h.port}"
+    if h.jump:
+        text += f"  (跳板: {h.jump})"
+    return text
 
 
 def cmd_add(args):
@@ -48,9 +93,12 @@ def cmd_add(args):
             print("ERROR: 密码不能为空")
             sys.exit(1)
 
-        # 添加到 CSV
         manager = get_hosts_manager(args)
-        manager.add(target.host, target.port, target.user, password)
+        if args.encrypt:
+            password = encrypt_for(manager, PasswordVault()).encrypt(password)
+
+        # 添加到 CSV
+        manager.add(target.host, target.port, target.user, password, args.jump or "")
         print(f"✓ 已添加主机信息: {target.user}@{target.host}:{target.port}")
     except (EOFError, KeyboardInterrupt):
         print("\n操作已取消")
@@ -70,10 +118,15 @@ def cmd_delete(args):
             print("ERROR: 删除主机信息必须指定用户名，格式: user@host")
             sys.exit(1)
 
-        manager = get_hosts_manager(args)
-        manager.load()
-        manager.delete(target.host, target.user)
-        print(f"✓ 已删除主机信息: {target.user}@{target.host}")
+        # 从记录实际所在的来源文件中删除
+        inventory = get_inventory(args)
+        inventory.load()
+        host_info = inventory.find_by_host_user(target.host, target.user)
+        if host_info is None:
+            raise UserNotFoundError(f"未找到主机信息: {target.user}@{target.host}")
+        source = inventory.source_of(host_info)
+        HostsManager(source).delete(target.host, target.user)
+        print(f"✓ 已删除主机信息: {target.user}@{target.host} ({source})")
     except (EOFError, KeyboardInterrupt):
         print("\n操作已取消")
         sys.exit(130)
@@ -85,9 +138,14 @@ def cmd_delete(args):
 def cmd_show(args):
     """显示主机信息"""
     try:
-        manager = get_hosts_manager(args)
+        manager = get_inventory(args)
         manager.load()
 
+        if len(manager.sources) > 1:
+            print("\n来源（按优先级）:\n")
+            for path in manager.sources:
+                print(f"  - {path}")
+
         if args.host:
             hosts = manager.find_by_host(args.host)
             if not hosts:
@@ -95,7 +153,7 @@ def cmd_show(args):
                 sys.exit(1)
             print(f"\n主机: {args.host}\n")
             for h in hosts:
-                print(f"  - {h.user}@{h.host}:{h.port}")
+                print(f"  - {format_host(h)}")
         else:
             all_hosts = manager.get_all_hosts()
             if not all_hosts:
@@ -105,8 +163,11 @@ def cmd_show(args):
                 for host, users in all_hosts.items():
                     print(f"{host}:")
                     for h in users:
-                        print(f"  - {h.user}@{h.host}:{h.port}")
+                        print(f"  - {format_host(h)}")
                 print()
+
+        for dup, winner, loser in manager.duplicates:
+            print(f"WARNING: {dup.key} 同时存在于 {winner} 和 {loser}，使用 {winner}")
     except (EOFError, KeyboardInterrupt):
         print("\n操作已取消")
         sys.exit(130)
@@ -115,6 +176,348 @@ def cmd_show(args):
         sys.exit(1)
 
 
+def cmd_encrypt(args):
+    """加密配置文件中的明文密码"""
+    try:
+        manager = get_hosts_manager(args)
+        vault = encrypt_for(manager, PasswordVault())
+        count = manager.encrypt_passwords(vault.encrypt)
+        print(f"✓ 已加密 {count} 条记录: {manager.csv_path}")
+    except (EOFError, KeyboardInterrupt):
+        print("\n操作已取消")
+        sys.exit(130)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+def cmd_agent(args):
+    """管理主密码缓存代理"""
+    try:
+        client = agent.AgentClient()
+
+        if args.action == "start":
+            pid = agent.start_agent(args.ttl, foreground=args.foreground)
+            print(f"✓ 代理已启动 (pid {pid}): {client.path}")
+        elif args.action == "stop":
+            if not client.stop():
+                print("ERROR: 代理未运行")
+                sys.exit(1)
+            print("✓ 代理已停止")
+        else:
+            status = client.status()
+            if not status:
+                print("代理未运行")
+                sys.exit(1)
+            state = f"已解锁，剩余 {status['ttl']} 秒" if status["unlocked"] else "未解锁"
+            print(f"代理运行中 (pid {status['pid']}): {state}")
+    except KeyboardInterrupt:
+        print("\n操作已取消")
+        sys.exit(130)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+def _print_diff(diff):
+    for line in format_diff(diff):
+        print(line)
+    print(
+        f"\n新增 {len(diff.added)}，删除 {len(diff.removed)}，"
+        f"变更 {len(diff.changed)}，未变 {diff.unchanged}"
+    )
+
+
+def cmd_diff(args):
+    """对比两个配置文件"""
+    try:
+        diff = compare(Path(args.old), Path(args.new))
+        _print_diff(diff)
+        # 与 diff(1) 一致：有差异时返回 1
+        sys.exit(1 if diff else 0)
+    except KeyboardInterrupt:
+        print("\n操作已取消")
+        sys.exit(130)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(2)
+
+
+def cmd_sync(args):
+    """将来源文件同步到本地配置文件"""
+    try:
+        local = get_inventory(args).primary_path
+        diff = sync_file(
+            local,
+            Path(args.source),
+            prune=args.prune,
+            dry_run=args.dry_run,
+        )
+        _print_diff(diff)
+        if args.dry_run:
+            print("（--dry-run: 未修改文件）")
+        elif diff:
+            print(f"✓ 已同步: {local}")
+        else:
+            print(f"✓ 无需变更: {local}")
+    except KeyboardInterrupt:
+        print("\n操作已取消")
+        sys.exit(130)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+def cmd_resolve(args):
+    """批量解析清单主机并刷新解析缓存"""
+    try:
+        inventory = get_inventory(args)
+        inventory.load()
+
+        resolve_fn = (
+            resolver.HostsFileResolver(Path(args.hosts_file))
+            if args.hosts_file
+            else resolver.system_resolver
+        )
+        cache = resolver.DNSCache(ttl=args.ttl)
+        canonicalizer = resolver.Canonicalizer(inventory, cache, resolve_fn)
+
+        if args.host:
+            matches = canonicalizer.lookup(args.host)
+            entry = cache.get(args.host) or {"names": [], "addrs": []}
+            print(f"名称: {', '.join(entry['names']) or '-'}")
+            print(f"地址: {', '.join(entry['addrs']) or '-'}")
+            print(f"匹配主机: {', '.join(matches) or '-'}")
+            return
+
+        count = canonicalizer.refresh(stale_only=not args.all, workers=args.jobs)
+        print(f"✓ 已解析 {count} 个主机: {cache.path}")
+    except KeyboardInterrupt:
+        print("\n操作已取消")
+        sys.exit(130)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+def _select_hosts(inventory, args):
+    """facts 命令的目标记录列表"""
+    if args.all:
+        return list(inventory.iter_hosts())
+
+    finder = HostFinder(inventory)
+    selected = {}
+    for target_str in args.targets:
+        try:
+            host_info, _ = finder.find(TargetParser.parse(target_str))
+        except MultipleUsersError as e:
+            # facts 是主机级信息，仅指定主机时取该主机的第一条记录
+            host_info = e.hosts[0]
+        selected.setdefault(host_info.key, host_info)
+    return list(selected.values())
+
+
+def cmd_facts(args):
+    """采集并查询主机信息"""
+    try:
+        names = args.facts.split(",") if args.facts else list(facts_mod.FACTS)
+        unknown = [n for n in names if n not in facts_mod.FACTS]
+        if unknown:
+            print(f"ERROR: 未知的 fact: {', '.join(unknown)}（可选: {', '.join(facts_mod.FACTS)}）")
+            sys.exit(1)
+        predicates = [facts_mod.parse_where(expr) for expr in args.where or []]
+        cache = facts_mod.FactsCache(ttl=args.ttl)
+
+        keys = None
+        if args.targets or args.all:
+            inventory = get_inventory(args)
+            inventory.load()
+            hosts = _select_hosts(inventory, args)
+            keys = {h.key for h in hosts}
+
+            stale = [h for h in hosts if args.refresh or not cache.is_fresh(h.key, names)]
+            if stale and not args.offline:
+                gatherer = facts_mod.FactGatherer(
+                    inventory,
+                    PasswordVault().reveal,
+                    jobs=args.jobs,
+                    timeout=args.timeout,
+                )
+                try:
+                    for host_info, result, error in gatherer.gather(stale, names):
+                        if error:
+                            print(f"ERROR: {host_info}: {error}", file=sys.stderr)
+                        else:
+                            cache.put(host_info, result)
+                finally:
+                    cache.save()
+
+        # 查询只读取缓存，超过 TTL（或采集失败、--offline）的记录标记为 stale
+        rows = []
+        for key, entry in cache.items():
+            if keys is not None and key not in keys:
+                continue
+            if all(p(entry["facts"]) for p in predicates):
+                rows.append((key, entry, not cache.is_fresh(key, names)))
+
+        if args.format == "json":
+            print(json.dumps(
+                [
+                    {
+                        "key": key,
+                        "gathered": entry["gathered"],
+                        "stale": stale,
+                        **{n: entry["facts"].get(n) for n in names},
+                    }
+                    for key, entry, stale in rows
+                ],
+                ensure_ascii=False,
+                indent=2,
+            ))
+            return
+
+        table = [["key"] + names + ["stale"]] + [
+            [key] + [entry["facts"].get(n, "-") for n in names] + ["yes" if stale else ""]
+            for key, entry, stale in rows
+        ]
+        widths = [max(len(str(r[i])) for r in table) for i in range(len(table[0]))]
+        for r in table:
+            print("  ".join(str(v).ljust(w) for v, w in zip(r, widths)).rstrip())
+    except KeyboardInterrupt:
+        print("\n操作已取消")
+        sys.exit(130)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+def _format_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}TB"
+
+
+def cmd_tunnel(args):
+    """管理端口转发隧道"""
+    try:
+        store = tunnel.TunnelStore()
+
+        if args.action == "add":
+            type_, spec = ("L", args.local) if args.local else ("R", args.remote)
+            t = tunnel.TunnelSpec.from_forward(args.name, args.target, type_, spec)
+            store.add(t)
+            print(f"✓ 已添加隧道 {t.name}: {t}")
+
+        elif args.action == "remove":
+            store.remove(args.name)
+            print(f"✓ 已删除隧道: {args.name}")
+
+        elif args.action == "start":
+            tunnels = store.load()
+            if args.names:
+                missing = set(args.names) - {t.name for t in tunnels}
+                if missing:
+                    print(f"ERROR: 未找到隧道: {', '.join(sorted(missing))}")
+                    sys.exit(1)
+                tunnels = [t for t in tunnels if t.name in args.names]
+            if not tunnels:
+                print("ERROR: 没有可启动的隧道，请先使用 xssh tunnel add 添加")
+                sys.exit(1)
+
+            inventory = get_inventory(args)
+            inventory.load()
+            groups = tunnel.build_groups(tunnels, inventory, PasswordVault().reveal)
+            if args.foreground:
+                print(f"隧道运行中（{len(tunnels)} 个转发，{len(groups)} 个连接），Ctrl+C 退出")
+            pid = tunnel.start_supervisor(groups, foreground=args.foreground)
+            if not args.foreground:
+                print(f"✓ 已启动 {len(tunnels)} 个隧道，共 {len(groups)} 个 SSH 连接 (pid {pid})")
+
+        elif args.action == "stop":
+            if not tunnel.stop_supervisor():
+                print("ERROR: 隧道管理进程未运行")
+                sys.exit(1)
+            print("✓ 隧道管理进程已停止")
+
+        else:
+            tunnels = store.load()
+            if not tunnels:
+                print("\n当前没有配置任何隧道\n")
+                return
+            state = tunnel.read_state()
+            runtime = {}
+            if state:
+                print(f"\n隧道管理进程运行中 (pid {state['pid']})\n")
+                for target, g in state["groups"].items():
+                    for name, stats in g["tunnels"].items():
+                        runtime[name] = (target, g, stats)
+            else:
+                print("\n隧道管理进程未运行\n")
+
+            for t in tunnels:
+                line = f"{t.name}: {t}"
+                if t.name in runtime:
+                    target, g, stats = runtime[t.name]
+                    latency = f"{g['latency_ms']}ms" if g["latency_ms"] is not None else "-"
+                    line += (
+                        f"\n    状态: {g['status']}  重启: {g['restarts']}  延迟: {latency}"
+                        f"  连接: {stats['active']}/{stats['connections']}"
+                        f"  收: {_format_bytes(stats['bytes_in'])}"
+                        f"  发: {_format_bytes(stats['bytes_out'])}"
+                    )
+                    if g["status"] != "up" and g["last_error"]:
+                        line += f"\n    错误: {g['last_error']}"
+                print(line)
+            print()
+    except KeyboardInterrupt:
+        print("\n操作已取消")
+        sys.exit(130)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+def cmd_replay(args):
+    """回放录制的会话"""
+    from xssh.recorder import replay
+
+    if args.speed <= 0:
+        print("ERROR: --speed 必须大于 0")
+        sys.exit(1)
+    try:
+        replay(Path(args.file), speed=args.speed, max_idle=args.max_idle)
+    except KeyboardInterrupt:
+        print()
+        sys.exit(130)
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+def cmd_completion(args):
+    """输出补全脚本或重建补全缓存"""
+    try:
+        if args.refresh:
+            inventory = get_inventory(args)
+            inventory.load()
+            for manager in inventory.managers:
+                cache = CompletionCache(manager.csv_path)
+                cache.refresh(manager)
+                print(f"✓ 已更新补全缓存: {cache.path}")
+            return
+
+        if not args.shell:
+            print("ERROR: 请指定 shell 类型 (bash/zsh/fish) 或使用 --refresh")
+            sys.exit(1)
+
+        sys.stdout.write(CompletionCache.script(args.shell, SUBCOMMANDS))
+    except Exception as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
 def cmd_connect(args):
     """连接主机"""
     if not args.target:
@@ -122,11 +525,11 @@ def cmd_connect(args):
         sys.exit(1)
 
     try:
-        csv_path = (
-            Path(args.config) if hasattr(args, "config") and args.config else None
-        )
-        xssh = XSSH(csv_path)
-        xssh.connect(args.target)
+        csv_paths = args.config if hasattr(args, "config") and args.config else None
+        resolve = getattr(args, "resolve", False) or os.environ.get("XSSH_RESOLVE") == "1"
+        record = Path(args.record) if getattr(args, "record", None) else None
+        xssh = XSSH(csv_paths, resolve=resolve)
+        xssh.connect(args.target, record=record)
     except KeyboardInterrupt:
         print("\n操作已取消")
         sys.exit(130)
@@ -152,7 +555,21 @@ def main():
   xssh delete root@192.168.1.1           # 删除主机
   xssh show                            # 显示所有主机
   xssh show 192.168.1.1               # 显示指定主机
-  xssh -i /path/to/hosts.csv root@host # 使用自定义配置文件""",
+  xssh add --encrypt root@192.168.1.1    # 加密存储密码
+  xssh add -J ops@bastion root@10.0.0.5  # 添加经由跳板机访问的主机
+  xssh agent start                     # 启动主密码缓存代理
+  xssh diff hosts.csv cmdb.csv          # 对比配置文件
+  xssh sync --from cmdb.csv            # 同步配置文件
+  xssh resolve                         # 解析清单主机
+  xssh -r root@db01                    # 按主机名/IP 解析结果匹配
+  xssh facts --all                     # 采集所有主机信息
+  xssh facts --where kernel~5.4        # 从缓存查询主机信息
+  xssh tunnel list                     # 查看端口转发隧道
+  xssh --record s.cast root@host       # 录制会话
+  xssh replay s.cast                   # 回放会话
+  xssh completion bash                 # 输出 bash 补全脚本
+  xssh -i /path/to/hosts.csv root@host # 使用自定义配置文件
+  xssh -i team.csv -i dc1.csv root@host # 合并多个配置文件""",
             )
 
             subparsers = parser.add_subparsers(
@@ -170,8 +587,12 @@ def main():
                 "target", help="目标主机，格式: user@host[:port]"
             )
             connect_parser.add_argument(
-                "-i", "--config", help="指定配置文件路径（默认: ~/.ssh/hosts.csv）"
+                "-i", "--config", action="append", help=CONFIG_HELP
+            )
+            connect_parser.add_argument(
+                "-r", "--resolve", action="store_true", help=RESOLVE_HELP
             )
+            connect_parser.add_argument("--record", metavar="FILE", help=RECORD_HELP)
             connect_parser.set_defaults(func=cmd_connect)
 
             # add 命令
@@ -183,7 +604,16 @@ def main():
             )
             add_parser.add_argument("target", help="目标主机，格式: user@host[:port]")
             add_parser.add_argument(
-                "-i", "--config", help="指定配置文件路径（默认: ~/.ssh/hosts.csv）"
+                "-J",
+                "--jump",
+                metavar="HOSTS",
+                help="跳板机，引用清单中的 user@host[:port]，多级用逗号分隔",
+            )
+            add_parser.add_argument(
+                "--encrypt", action="store_true", help="使用主密码加密存储密码（需安装 cryptography）"
+            )
+            add_parser.add_argument(
+                "-i", "--config", action="append", help=CONFIG_HELP
             )
             add_parser.set_defaults(func=cmd_add)
 
@@ -196,7 +626,7 @@ def main():
             )
             delete_parser.add_argument("target", help="目标主机，格式: user@host")
             delete_parser.add_argument(
-                "-i", "--config", help="指定配置文件路径（默认: ~/.ssh/hosts.csv）"
+                "-i", "--config", action="append", help=CONFIG_HELP
             )
             delete_parser.set_defaults(func=cmd_delete)
 
@@ -211,10 +641,263 @@ def main():
                 "host", nargs="?", help="主机名（可选，不指定则显示所有主机）"
             )
             show_parser.add_argument(
-                "-i", "--config", help="指定配置文件路径（默认: ~/.ssh/hosts.csv）"
+                "-i", "--config", action="append", help=CONFIG_HELP
             )
             show_parser.set_defaults(func=cmd_show)
 
+            # encrypt 命令
+            encrypt_parser = subparsers.add_parser(
+                "encrypt",
+                help="加密明文密码",
+                description="使用主密码加密配置文件中所有明文密码（需安装 cryptography）",
+                epilog="示例: xssh encrypt -i /path/to/hosts.csv",
+            )
+            encrypt_parser.add_argument(
+                "-i", "--config", action="append", help=CONFIG_HELP
+            )
+            encrypt_parser.set_defaults(func=cmd_encrypt)
+
+            # agent 命令
+            agent_parser = subparsers.add_parser(
+                "agent",
+                help="主密码缓存代理",
+                description="启动/停止/查询主密码缓存代理，有效期内无需重复输入主密码",
+                epilog="示例:\n  xssh agent start --ttl 7200\n  xssh agent status\n  xssh agent stop",
+                formatter_class=argparse.RawDescriptionHelpFormatter,
+            )
+            agent_parser.add_argument(
+                "action", choices=["start", "stop", "status"], help="操作"
+            )
+            agent_parser.add_argument(
+                "--ttl",
+                type=int,
+                default=agent.DEFAULT_TTL,
+                help=f"主密码缓存有效期，单位秒（默认: {agent.DEFAULT_TTL}）",
+            )
+            agent_parser.add_argument(
+                "--foreground", action="store_true", help="在前台运行"
+            )
+            agent_parser.set_defaults(func=cmd_agent)
+
+            # diff 命令
+            diff_parser = subparsers.add_parser(
+                "diff",
+                help="对比两个配置文件",
+                description="按 user@host 对比两个配置文件的新增、删除和变更记录（不输出密码）",
+                epilog="示例: xssh diff hosts.csv cmdb.csv",
+            )
+            diff_parser.add_argument("old", help="原文件")
+            diff_parser.add_argument("new", help="新文件")
+            diff_parser.set_defaults(func=cmd_diff)
+
+            # sync 命令
+            sync_parser = subparsers.add_parser(
+                "sync",
+                help="从其他文件同步配置",
+                description="将来源文件的变更以最小改动同步到本地配置文件（一次原子写入）",
+                epilog="示例: xssh sync --from cmdb.csv --prune --dry-run",
+            )
+            sync_parser.add_argument(
+                "--from", dest="source", required=True, metavar="FILE", help="来源文件"
+            )
+            sync_parser.add_argument(
+                "--prune",
+                action="store_true",
+                help="删除本地独有（来源文件中没有）的记录，默认保留",
+            )
+            sync_parser.add_argument(
+                "--dry-run", action="store_true", help="只显示变更，不修改文件"
+            )
+            sync_parser.add_argument(
+                "-i", "--config", action="append", help=CONFIG_HELP
+            )
+            sync_parser.set_defaults(func=cmd_sync)
+
+            # resolve 命令
+            resolve_parser = subparsers.add_parser(
+                "resolve",
+                help="解析主机名/IP",
+                description="批量解析清单中的主机并缓存正向/反向结果，供 -r/--resolve 匹配使用",
+                epilog="示例:\n  xssh resolve              # 解析缺失或过期的主机\n  xssh resolve db01         # 查看 db01 匹配的清单主机",
+                formatter_class=argparse.RawDescriptionHelpFormatter,
+            )
+            resolve_parser.add_argument(
+                "host", nargs="?", help="查看指定名称或地址匹配的清单主机"
+            )
+            resolve_parser.add_argument(
+                "--all", action="store_true", help="重新解析所有主机（默认只解析缺失或过期的）"
+            )
+            resolve_parser.add_argument(
+                "--ttl",
+                type=int,
+                default=resolver.DEFAULT_TTL,
+                help=f"缓存有效期，单位秒（默认: {resolver.DEFAULT_TTL}）",
+            )
+            resolve_parser.add_argument(
+                "-j",
+                "--jobs",
+                type=int,
+                default=resolver.DEFAULT_WORKERS,
+                help=f"并发解析数（默认: {resolver.DEFAULT_WORKERS}）",
+            )
+            resolve_parser.add_argument(
+                "--hosts-file", metavar="FILE", help="使用 hosts 格式文件代替系统解析器"
+            )
+            resolve_parser.add_argument(
+                "-i", "--config", action="append", help=CONFIG_HELP
+            )
+            resolve_parser.set_defaults(func=cmd_resolve)
+
+            # facts 命令
+            facts_parser = subparsers.add_parser(
+                "facts",
+                help="采集/查询主机信息",
+                description=(
+                    "并发采集主机信息（系统、内核、运行时间、CPU、内存等）并缓存；\n"
+                    "不指定目标时只查询缓存，不访问网络"
+                ),
+                epilog=(
+                    "示例:\n"
+                    "  xssh facts --all                           # 采集所有主机\n"
+                    "  xssh facts root@192.168.1.1 --refresh      # 强制重新采集\n"
+                    "  xssh facts --where kernel~5.4 --format json # 从缓存查询"
+                ),
+                formatter_class=argparse.RawDescriptionHelpFormatter,
+            )
+            facts_parser.add_argument(
+                "targets", nargs="*", help="目标主机，格式: user@host[:port] 或 host"
+            )
+            facts_parser.add_argument(
+                "--all", action="store_true", help="采集清单中的所有主机"
+            )
+            facts_parser.add_argument(
+                "--refresh", action="store_true", help="忽略缓存，重新采集"
+            )
+            facts_parser.add_argument(
+                "--offline", action="store_true", help="只使用缓存，不采集"
+            )
+            facts_parser.add_argument(
+                "--where",
+                action="append",
+                metavar="EXPR",
+                help="过滤条件，可多次指定: name=value, name!=value, name~正则, name>数字",
+            )
+            facts_parser.add_argument(
+                "--facts", metavar="NAMES", help="逗号分隔的 fact 名称（默认全部）"
+            )
+            facts_parser.add_argument(
+                "--format", choices=["table", "json"], default="table", help="输出格式"
+            )
+            facts_parser.add_argument(
+                "--ttl",
+                type=int,
+                default=facts_mod.DEFAULT_TTL,
+                help=f"缓存有效期，单位秒（默认: {facts_mod.DEFAULT_TTL}）",
+            )
+            facts_parser.add_argument(
+                "-j",
+                "--jobs",
+                type=int,
+                default=facts_mod.DEFAULT_JOBS,
+                help=f"并发数（默认: {facts_mod.DEFAULT_JOBS}）",
+            )
+            facts_parser.add_argument(
+                "--timeout",
+                type=float,
+                default=facts_mod.DEFAULT_TIMEOUT,
+                help=f"单台主机超时，单位秒（默认: {facts_mod.DEFAULT_TIMEOUT}）",
+            )
+            facts_parser.add_argument(
+                "-i", "--config", action="append", help=CONFIG_HELP
+            )
+            facts_parser.set_defaults(func=cmd_facts)
+
+            # tunnel 命令
+            tunnel_parser = subparsers.add_parser(
+                "tunnel",
+                help="端口转发隧道",
+                description=(
+                    "声明、启动、查看和停止端口转发隧道；\n"
+                    "同一目标主机的转发共用一个 SSH 连接，断开后自动重启"
+                ),
+                epilog=(
+                    "示例:\n"
+                    "  xssh tunnel add db root@192.168.1.1 -L 15432:10.0.0.5:5432\n"
+                    "  xssh tunnel start\n"
+                    "  xssh tunnel list\n"
+                    "  xssh tunnel stop"
+                ),
+                formatter_class=argparse.RawDescriptionHelpFormatter,
+            )
+            tunnel_sub = tunnel_parser.add_subparsers(
+                dest="action", title="操作", metavar="{add,remove,start,stop,list}"
+            )
+            tunnel_sub.required = True
+
+            tunnel_add = tunnel_sub.add_parser("add", help="添加隧道")
+            tunnel_add.add_argument("name", help="隧道名称")
+            tunnel_add.add_argument("target", help="目标主机，格式: user@host[:port]")
+            forward = tunnel_add.add_mutually_exclusive_group(required=True)
+            forward.add_argument(
+                "-L", dest="local", metavar="SPEC", help="本地转发 [bind:]port:host:hostport"
+            )
+            forward.add_argument(
+                "-R", dest="remote", metavar="SPEC", help="远程转发 [bind:]port:host:hostport"
+            )
+
+            tunnel_remove = tunnel_sub.add_parser("remove", help="删除隧道")
+            tunnel_remove.add_argument("name", help="隧道名称")
+
+            tunnel_start = tunnel_sub.add_parser("start", help="启动隧道")
+            tunnel_start.add_argument(
+                "names", nargs="*", help="隧道名称（默认启动全部）"
+            )
+            tunnel_start.add_argument(
+                "--foreground", action="store_true", help="在前台运行"
+            )
+            tunnel_start.add_argument(
+                "-i", "--config", action="append", help=CONFIG_HELP
+            )
+
+            tunnel_sub.add_parser("stop", help="停止所有隧道")
+            tunnel_sub.add_parser("list", help="查看隧道及运行状态")
+            tunnel_parser.set_defaults(func=cmd_tunnel)
+
+            # replay 命令
+            replay_parser = subparsers.add_parser(
+                "replay",
+                help="回放录制的会话",
+                description="按原始节奏回放 --record 录制的 asciicast 文件",
+                epilog="示例: xssh replay session.cast --speed 2 --max-idle 1",
+            )
+            replay_parser.add_argument("file", help="录制文件")
+            replay_parser.add_argument(
+                "--speed", type=float, default=1.0, help="回放倍速（默认: 1）"
+            )
+            replay_parser.add_argument(
+                "--max-idle", type=float, metavar="SECONDS", help="最长空闲等待秒数"
+            )
+            replay_parser.set_defaults(func=cmd_replay)
+
+            # completion 命令
+            completion_parser = subparsers.add_parser(
+                "completion",
+                help="Shell 补全",
+                description="输出 shell 补全脚本，或根据配置文件重建补全缓存",
+                epilog='示例:\n  eval "$(xssh completion bash)"\n  xssh completion --refresh',
+                formatter_class=argparse.RawDescriptionHelpFormatter,
+            )
+            completion_parser.add_argument(
+                "shell", nargs="?", choices=["bash", "zsh", "fish"], help="shell 类型"
+            )
+            completion_parser.add_argument(
+                "--refresh", action="store_true", help="重建补全缓存"
+            )
+            completion_parser.add_argument(
+                "-i", "--config", action="append", help=CONFIG_HELP
+            )
+            completion_parser.set_defaults(func=cmd_completion)
+
             args = parser.parse_args()
             args.func(args)
         else:
@@ -227,7 +910,9 @@ def main():
   xssh root@192.168.1.1              # 连接主机
   xssh root@192.168.1.1:2222         # 指定端口连接
   xssh 192.168.1.1                    # 交互式选择用户
-  xssh -i /path/to/hosts.csv root@host # 使用自定义配置文件""",
+  xssh --record s.cast root@host       # 录制会话
+  xssh -i /path/to/hosts.csv root@host # 使用自定义配置文件
+  xssh -i team.csv -i dc1.csv root@host # 合并多个配置文件""",
             )
 
             parser.add_argument(
@@ -237,10 +922,17 @@ def main():
             parser.add_argument(
                 "-i",
                 "--config",
-                help="指定配置文件路径（默认: ~/.ssh/hosts.csv）",
+                action="append",
+                help=CONFIG_HELP,
                 metavar="FILE",
             )
 
+            parser.add_argument(
+                "-r", "--resolve", action="store_true", help=RESOLVE_HELP
+            )
+
+            parser.add_argument("--record", metavar="FILE", help=RECORD_HELP)
+
             parser.add_argument(
                 "-v", "--version", action="version", version="%(prog)s 1.0.0"
             )
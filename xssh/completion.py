@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shell 补全模块
+
+补全候选预先写入与 hosts.csv 同目录的 `<csv>.complete` 文件
+（按字节序排序，每行一个候选），shell 端通过 `look` 二分查找或
+`grep -F` + `awk` 前缀过滤直接读取该文件，补全时无需启动 Python。
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, List
+
+from xssh.models import HostInfo
+from xssh.exceptions import XSSHError
+
+COMPLETION_SUFFIX = ".complete"
+
+
+class CompletionCache:
+    """补全候选缓存"""
+
+    def __init__(self, csv_path: Path):
+        self.csv_path = Path(csv_path)
+        self.path = self.csv_path.with_name(self.csv_path.name + COMPLETION_SUFFIX)
+
+    @staticmethod
+    def candidates(hosts: Iterable[HostInfo]) -> List[str]:
+        """
+        生成排序后的补全候选
+
+        每条记录生成 `user@host`（端口非 22 时为 `user@host:port`），
+        另外为每个主机生成一条裸 `host` 候选。
+        """
+        lines = set()
+        for h in hosts:
+            lines.add(h.host)
+            if h.port == 22:
+                lines.add(f"{h.user}@{h.host}")
+            else:
+                lines.add(f"{h.user}@{h.host}:{h.port}")
+        # look(1) 要求按 LC_ALL=C 字节序排序
+        return sorted(lines, key=lambda s: s.encode("utf-8"))
+
+    def write(self, hosts: Iterable[HostInfo]):
+        """原子写入补全缓存"""
+        data = "".join(f"{line}\n" for line in self.candidates(hosts))
+        try:
+            fd, tmp = tempfile.mkstemp(
+                prefix=".xssh-complete-", dir=str(self.path.parent)
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+                    f.write(data)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except (IOError, OSError) as e:
+            raise XSSHError(f"无法写入补全缓存: {e}")
+
+    def refresh(self, hosts_manager):
+        """根据已加载的 HostsManager 重建补全缓存"""
+        hosts = [h for users in hosts_manager.get_all_hosts().values() for h in users]
+        self.write(hosts)
+
+    @staticmethod
+    def script(shell: str, subcommands: Iterable[str]) -> str:
+        """返回指定 shell 的补全脚本（subcommands 为 CLI 的子命令列表）"""
+        try:
+            template = SCRIPTS[shell]
+        except KeyError:
+            raise XSSHError(
+                f"不支持的 shell: {shell}（可选: {', '.join(sorted(SCRIPTS))}）"
+            )
+        return template.replace("__SUBCOMMANDS__", " ".join(subcommands))
+
+
+BASH_SCRIPT = r"""# xssh bash 补全
+# 用法: eval "$(xssh completion bash)"
+_xssh_lookup() {
+    # 候选文件已按字节序排序：优先用 look 二分查找，否则先用 grep -F 过滤
+    # 包含前缀的行，再由 awk 保留以前缀开头的行
+    if command -v look >/dev/null 2>&1; then
+        LC_ALL=C look "$1" "$2" 2>/dev/null
+    else
+        LC_ALL=C grep -F -- "$1" "$2" |
+            P="$1" LC_ALL=C awk 'BEGIN { p = ENVIRON["P"] } index($0, p) == 1'
+    fi
+}
+
+_xssh_complete() {
+    local cur prev
+    if declare -F _get_comp_words_by_ref >/dev/null 2>&1; then
+        _get_comp_words_by_ref -n : cur prev
+    else
+        cur="${COMP_WORDS[COMP_CWORD]}"
+        prev="${COMP_WORDS[COMP_CWORD-1]}"
+    fi
+
+    if [[ "$prev" == "-i" || "$prev" == "--config" ]]; then
+        COMPREPLY=( $(compgen -f -- "$cur") )
+        return
+    fi
+
+    COMPREPLY=()
+    if [[ $COMP_CWORD -eq 1 ]]; then
+        COMPREPLY=( $(compgen -W "__SUBCOMMANDS__" -- "$cur") )
+    fi
+
+    local cache csv out
+    local -a caches
+    if [[ -n "$XSSH_COMPLETION_CACHE" ]]; then
+        IFS=: read -ra caches <<< "$XSSH_COMPLETION_CACHE"
+    else
+        # 与 xssh 的默认来源一致: $XSSH_HOSTS、~/.ssh/hosts.csv、~/.ssh/hosts.d/*.csv
+        local src
+        local -a sources
+        IFS=: read -ra sources <<< "$XSSH_HOSTS"
+        for src in "${sources[@]}" "$HOME/.ssh/hosts.csv" "$HOME/.ssh/hosts.d"; do
+            if [[ -d "$src" ]]; then
+                for csv in "$src"/*.csv; do
+                    [[ -f "$csv" ]] && caches+=( "$csv.complete" )
+                done
+            elif [[ -n "$src" ]]; then
+                caches+=( "$src.complete" )
+            fi
+        done
+    fi
+    for cache in "${caches[@]}"; do
+        csv="${cache%.complete}"
+        if [[ -f "$csv" && ( ! -f "$cache" || "$csv" -nt "$cache" ) ]]; then
+            xssh completion --refresh -i "$csv" >/dev/null 2>&1
+        fi
+        [[ -f "$cache" ]] || continue
+        # 先整体读入再交给 mapfile（mapfile 从管道读取时逐字节 read），
+        # 用 -O 直接追加到 COMPREPLY 末尾，避免复制数组
+        out=$(_xssh_lookup "$cur" "$cache")
+        [[ -n "$out" ]] || continue
+        mapfile -t -O "${#COMPREPLY[@]}" COMPREPLY <<< "$out"
+    done
+
+    if declare -F __ltrim_colon_completions >/dev/null 2>&1; then
+        __ltrim_colon_completions "$cur"
+    fi
+}
+
+complete -F _xssh_complete xssh
+"""
+
+ZSH_SCRIPT = r"""#compdef xssh
+# xssh zsh 补全
+# 用法: eval "$(xssh completion zsh)"
+_xssh_lookup() {
+    if (( $+commands[look] )); then
+        LC_ALL=C look "$1" "$2" 2>/dev/null
+    else
+        LC_ALL=C grep -F -- "$1" "$2" |
+            P="$1" LC_ALL=C awk 'BEGIN { p = ENVIRON["P"] } index($0, p) == 1'
+    fi
+}
+
+_xssh() {
+    if [[ "$words[CURRENT-1]" == (-i|--config) ]]; then
+        _files
+        return
+    fi
+
+    if (( CURRENT == 2 )); then
+        local -a subcommands
+        subcommands=(__SUBCOMMANDS__)
+        compadd -a subcommands
+    fi
+
+    local cache csv
+    local -a caches targets
+    if [[ -n "$XSSH_COMPLETION_CACHE" ]]; then
+        caches=(${(s.:.)XSSH_COMPLETION_CACHE})
+    else
+        # 与 xssh 的默认来源一致: $XSSH_HOSTS、~/.ssh/hosts.csv、~/.ssh/hosts.d/*.csv
+        local src
+        local -a extra
+        for src in ${(s.:.)XSSH_HOSTS} "$HOME/.ssh/hosts.csv" "$HOME/.ssh/hosts.d"; do
+            if [[ -d "$src" ]]; then
+                extra=("$src"/*.csv(N))
+                caches+=(${^extra}.complete)
+            else
+                caches+=("$src.complete")
+            fi
+        done
+    fi
+    for cache in $caches; do
+        csv="${cache%.complete}"
+        if [[ -f "$csv" && ( ! -f "$cache" || "$csv" -nt "$cache" ) ]]; then
+            xssh completion --refresh -i "$csv" >/dev/null 2>&1
+        fi
+        [[ -f "$cache" ]] || continue
+        targets=(${(f)"$(_xssh_lookup "$PREFIX" "$cache")"})
+        compadd -a targets
+    done
+}
+
+compdef _xssh xssh
+"""
+
+FISH_SCRIPT = r"""# xssh fish 补全
+# 用法: xssh completion fish | source
+function __xssh_targets
+    set -l caches
+    if test -n "$XSSH_COMPLETION_CACHE"
+        set caches (string split : -- $XSSH_COMPLETION_CACHE)
+    else
+        # 与 xssh 的默认来源一致: $XSSH_HOSTS、~/.ssh/hosts.csv、~/.ssh/hosts.d/*.csv
+        for src in (string split : -- "$XSSH_HOSTS") $HOME/.ssh/hosts.csv $HOME/.ssh/hosts.d
+            if test -d $src
+                for csv in $src/*.csv
+                    set -a caches $csv.complete
+                end
+            else if test -n "$src"
+                set -a caches $src.complete
+            end
+        end
+    end
+    set -l token (commandline -ct)
+    for cache in $caches
+        set -l csv (string replace -r '\.complete$' '' -- $cache)
+        if test -f $csv
+            if not test -f $cache; or command test $csv -nt $cache
+                xssh completion --refresh -i $csv >/dev/null 2>&1
+            end
+        end
+        test -f $cache; or continue
+        if command -sq look
+            env LC_ALL=C look $token $cache 2>/dev/null
+        else
+            env LC_ALL=C grep -F -- "$token" $cache |
+                env P=$token LC_ALL=C awk 'BEGIN { p = ENVIRON["P"] } index($0, p) == 1'
+        end
+    end
+end
+
+complete -c xssh -f
+complete -c xssh -n '__fish_use_subcommand' -a '__SUBCOMMANDS__'
+complete -c xssh -s i -l config -r -F -d '配置文件路径'
+complete -c xssh -a '(__xssh_targets)'
+"""
+
+SCRIPTS = {
+    "bash": BASH_SCRIPT,
+    "zsh": ZSH_SCRIPT,
+    "fish": FISH_SCRIPT,
+}
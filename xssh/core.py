@@ -8,27 +8,38 @@ import sys
 
 from xssh.models import HostInfo
 from xssh.parser import TargetParser
-from xssh.hosts_manager import HostsManager
+from xssh.inventory import Inventory
 from xssh.finder import HostFinder, MultipleUsersError
 from xssh.selector import UserSelector
 from xssh.ssh import SSHClient
+from xssh.crypto import PasswordVault
+from xssh.resolver import Canonicalizer
+from xssh.jump import JumpChain
 from xssh.exceptions import SSHPassNotFoundError
 
 
 class XSSH:
     """xssh 核心类"""
 
-    def __init__(self, csv_path=None):
+    def __init__(self, csv_path=None, resolve: bool = False):
         from pathlib import Path
 
-        csv_path = Path(csv_path) if csv_path else None
+        # 支持单个路径或多个来源路径
+        if csv_path is None:
+            csv_paths = []
+        elif isinstance(csv_path, (str, Path)):
+            csv_paths = [Path(csv_path)]
+        else:
+            csv_paths = [Path(p) for p in csv_path]
         self.parser = TargetParser()
-        self.hosts_manager = HostsManager(csv_path)
+        self.hosts_manager = Inventory(csv_paths)
         self.finder = None
         self.selector = UserSelector()
+        self.resolve = resolve
+        self.vault = PasswordVault()
 
-    def connect(self, target_str: str):
-        """连接到目标主机"""
+    def connect(self, target_str: str, record=None):
+        """连接到目标主机，指定 record 时把会话录制到该文件"""
         try:
             # 检查 sshpass
             if not SSHClient.check_sshpass():
@@ -47,7 +58,8 @@ class XSSH:
             target = self.parser.parse(target_str)
 
             # 初始化查找器
-            self.finder = HostFinder(self.hosts_manager)
+            canonicalizer = Canonicalizer(self.hosts_manager) if self.resolve else None
+            self.finder = HostFinder(self.hosts_manager, canonicalizer)
 
             # 查找主机信息
             try:
@@ -57,8 +69,22 @@ class XSSH:
                 host_info = self.selector.select(e.host, e.hosts)
                 port = target.port or host_info.port
 
+            # 跨文件重复提示
+            for dup, winner, loser in self.hosts_manager.duplicates:
+                if dup.key == host_info.key:
+                    print(
+                        f"WARNING: {dup.key} 同时存在于 {winner} 和 {loser}，使用 {winner}",
+                        file=sys.stderr,
+                    )
+
+            # 建立（或复用）跳板机连接，跳板机密码仅在新建连接时解密
+            proxy_command = JumpChain(self.hosts_manager, self.vault.reveal).prepare(host_info)
+
+            # 仅解密选中的这一条记录
+            host_info = self.vault.reveal(host_info)
+
             # 连接 SSH
-            client = SSHClient(host_info, port)
+            client = SSHClient(host_info, port, proxy_command, record)
             client.connect()
         except KeyboardInterrupt:
             print("\n连接已取消")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+密码加密模块
+
+加密后的 password 字段格式:
+
+    enc:v1:<salt>:<token>
+
+其中 salt 为 base64url 编码的随机盐，token 为 Fernet 密文，密钥由主密码
+经 PBKDF2-HMAC-SHA256 派生。加载 CSV 时不做任何解密，只有真正用于连接的
+那一条记录才会被解密。Fernet 来自可选依赖 cryptography（pip install xssh[crypto]）。
+"""
+
+import base64
+import getpass
+import hashlib
+import os
+from dataclasses import replace
+from typing import Callable, Dict, Optional
+
+from xssh.models import HostInfo
+from xssh.exceptions import PasswordDecryptError, XSSHError
+
+ENC_PREFIX = "enc:v1:"
+KDF_ITERATIONS = 200_000
+SALT_SIZE = 16
+
+
+def is_encrypted(value: str) -> bool:
+    """判断 password 字段是否为密文"""
+    return value.startswith(ENC_PREFIX)
+
+
+def _fernet(key: bytes):
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        raise XSSHError(
+            "密码加密需要安装 cryptography\n"
+            "请执行: pip install 'xssh[crypto]'"
+        )
+    return Fernet(key)
+
+
+def derive_key(passphrase: str, salt: bytes) -> bytes:
+    """由主密码和盐派生 Fernet 密钥"""
+    raw = hashlib.pbkdf2_hmac(
+        "sha256", passphrase.encode("utf-8"), salt, KDF_ITERATIONS
+    )
+    return base64.urlsafe_b64encode(raw)
+
+
+def split_encrypted(value: str):
+    """拆分密文字段，返回 (salt, token)"""
+    try:
+        salt_b64, token = value[len(ENC_PREFIX):].split(":", 1)
+        salt = base64.urlsafe_b64decode(salt_b64.encode("ascii"))
+    except (ValueError, UnicodeEncodeError):
+        raise PasswordDecryptError("password 密文格式错误")
+    return salt, token
+
+
+def encrypt_password(password: str, key: bytes, salt: bytes) -> str:
+    """使用已派生的密钥加密密码"""
+    token = _fernet(key).encrypt(password.encode("utf-8")).decode("ascii")
+    salt_b64 = base64.urlsafe_b64encode(salt).decode("ascii")
+    return f"{ENC_PREFIX}{salt_b64}:{token}"
+
+
+def decrypt_password(value: str, key: bytes) -> str:
+    """使用已派生的密钥解密密码"""
+    fernet = _fernet(key)
+    from cryptography.fernet import InvalidToken
+
+    _, token = split_encrypted(value)
+    try:
+        return fernet.decrypt(token.encode("ascii")).decode("utf-8")
+    except (InvalidToken, UnicodeError):
+        raise PasswordDecryptError("主密码错误或密文已损坏")
+
+
+class PasswordVault:
+    """
+    按需解密密码
+
+    主密码只在第一次遇到密文时获取（优先询问密钥缓存代理，其次交互输入），
+    派生出的密钥按 salt 缓存在进程内，同一进程内解密多条记录不会重复派生。
+    交互输入的主密码只有在成功解密后才会交给代理缓存。
+    """
+
+    def __init__(self, prompt: Optional[Callable[[str], str]] = None):
+        self._prompt = prompt or getpass.getpass
+        self._passphrase: Optional[str] = None
+        self._keys: Dict[bytes, bytes] = {}
+        self._agent_salts = set()
+        self._pushed = False
+        self._encrypt_salt: Optional[bytes] = None
+
+    def _agent(self):
+        from xssh.agent import AgentClient
+
+        return AgentClient()
+
+    def passphrase(self, confirm: bool = False) -> str:
+        """获取主密码"""
+        if self._passphrase is not None:
+            return self._passphrase
+
+        passphrase = self._prompt("请输入主密码: ")
+        if confirm and passphrase != self._prompt("确认主密码: "):
+            raise PasswordDecryptError("两次输入的主密码不一致")
+        if not passphrase:
+            raise PasswordDecryptError("主密码不能为空")
+
+        self._passphrase = passphrase
+        return passphrase
+
+    def key(self, salt: bytes) -> bytes:
+        """获取 salt 对应的密钥"""
+        key = self._keys.get(salt)
+        if key is not None:
+            return key
+
+        key = self._agent().get_key(salt)
+        if key is None:
+            key = derive_key(self.passphrase(), salt)
+        else:
+            self._agent_salts.add(salt)
+
+        self._keys[salt] = key
+        return key
+
+    def _forget(self, salt: bytes):
+        """丢弃错误的密钥（及其来源的主密码）"""
+        self._keys.pop(salt, None)
+        if salt in self._agent_salts:
+            # 代理缓存的主密码有误：清除代理，改为交互输入
+            self._agent_salts.discard(salt)
+            self._agent().clear()
+        else:
+            self._passphrase = None
+            self._pushed = False
+
+    def decrypt(self, value: str) -> str:
+        """解密单个 password 密文字段"""
+        salt, _ = split_encrypted(value)
+        key = self.key(salt)
+        from_agent = salt in self._agent_salts
+        try:
+            password = decrypt_password(value, key)
+        except PasswordDecryptError:
+            self._forget(salt)
+            if not from_agent:
+                raise
+            # 代理中的主密码错误，重新输入一次
+            try:
+                password = decrypt_password(value, self.key(salt))
+            except PasswordDecryptError:
+                self._forget(salt)
+                raise
+
+        # 解密成功说明输入的主密码正确，此时才交给代理缓存
+        if salt not in self._agent_salts and not self._pushed:
+            self._agent().set_passphrase(self._passphrase)
+            self._pushed = True
+        return password
+
+    def reveal(self, host_info: HostInfo) -> HostInfo:
+        """返回密码已解密的 HostInfo 副本（明文记录原样返回）"""
+        if not is_encrypted(host_info.password):
+            return host_info
+        return replace(host_info, password=self.decrypt(host_info.password))
+
+    def adopt(self, value: str):
+        """
+        以文件中已有的密文验证主密码，之后的 encrypt() 复用它的 salt 和密钥
+
+        保证同一个文件中的所有密文使用同一个主密码。
+        """
+        self.decrypt(value)
+        self._encrypt_salt, _ = split_encrypted(value)
+
+    def encrypt(self, password: str) -> str:
+        """
+        使用主密码加密密码
+
+        同一个 PasswordVault 内复用一个随机 salt，批量加密时只派生一次密钥
+        （Fernet 每条密文自带随机 IV）。调用过 adopt() 时复用已有密文的 salt。
+        """
+        if self._encrypt_salt is None:
+            salt = os.urandom(SALT_SIZE)
+            agent = self._agent()
+            key = agent.get_key(salt)
+            if key is None:
+                # 新输入的主密码未经验证，不交给代理缓存
+                key = derive_key(self.passphrase(confirm=True), salt)
+            self._keys[salt] = key
+            self._encrypt_salt = salt
+
+        salt = self._encrypt_salt
+        return encrypt_password(password, self._keys[salt], salt)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+守护进程辅助模块
+"""
+
+import os
+from typing import Callable
+
+from xssh.exceptions import XSSHError
+
+
+def spawn(main: Callable[[Callable[[], None]], None]) -> int:
+    """
+    以守护进程方式运行 main(ready)
+
+    main 完成初始化（如绑定端口）后调用 ready()，此时父进程返回守护进程 pid；
+    若 main 在调用 ready() 之前失败，父进程抛出 XSSHError。
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid > 0:
+        # 父进程：等待守护进程就绪
+        os.close(write_fd)
+        with os.fdopen(read_fd, "rb") as r:
+            data = r.read()
+        os.waitpid(pid, 0)
+        if not data:
+            raise XSSHError("后台进程启动失败")
+        return int(data.decode("ascii"))
+
+    # 子进程：脱离终端后再 fork 一次成为守护进程
+    os.close(read_fd)
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+
+    def ready():
+        os.write(write_fd, str(os.getpid()).encode("ascii"))
+        os.close(write_fd)
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+
+    try:
+        main(ready)
+    except BaseException:
+        os._exit(1)
+    os._exit(0)
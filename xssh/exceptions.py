@@ -63,3 +63,35 @@ class SSHConnectionError(XSSHError):
     """SSH 连接错误"""
 
     pass
+
+
+class PasswordDecryptError(XSSHError):
+    """密码解密失败"""
+
+    pass
+
+
+class AgentError(XSSHError):
+    """密钥缓存代理错误"""
+
+    pass
+
+
+class JumpHostError(XSSHError):
+    """跳板机配置或连接错误"""
+
+    pass
+
+
+class CommandTimeoutError(SSHConnectionError):
+    """远程命令执行超时"""
+
+    pass
+
+
+class RemoteCommandError(XSSHError):
+    """远程命令返回非零退出码"""
+
+    def __init__(self, message: str, returncode: int):
+        self.returncode = returncode
+        super().__init__(message)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+主机信息（facts）采集模块
+
+每台主机只执行一条远程命令，以 `__xssh_fact__<TAB>名称<TAB>值` 的行格式
+返回所有 facts；多台主机通过线程池并发采集。结果按 HostInfo.key 缓存在
+~/.cache/xssh/facts.json 中，每个 fact 带有各自的采集时间，在 TTL 内的查询（过滤、输出
+JSON 等）直接读取缓存，不访问网络。
+
+通过 register_fact() 可以添加自定义 fact。
+"""
+
+import json
+import os
+import re
+import shlex
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from xssh.models import HostInfo
+from xssh.ssh import SSHClient
+from xssh.jump import JumpChain
+from xssh.inventory import cache_dir
+from xssh.exceptions import XSSHError, SSHConnectionError
+
+DEFAULT_TTL = 3600
+DEFAULT_JOBS = 16
+DEFAULT_TIMEOUT = 30
+MARKER = "__xssh_fact__"
+
+# 名称 -> 远程 shell 片段（取输出的第一行）
+FACTS: Dict[str, str] = {
+    "hostname": "hostname",
+    "os": '. /etc/os-release && echo "$PRETTY_NAME" || uname -s',
+    "kernel": "uname -r",
+    "arch": "uname -m",
+    "uptime": "cut -d' ' -f1 /proc/uptime | cut -d. -f1",
+    "cpus": "nproc || getconf _NPROCESSORS_ONLN",
+    "mem_mb": "awk '/^MemTotal:/ {print int($2/1024)}' /proc/meminfo",
+}
+
+
+def register_fact(name: str, command: str):
+    """注册自定义 fact"""
+    if not re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", name):
+        raise XSSHError(f"fact 名称无效: {name}")
+    FACTS[name] = command
+
+
+def build_script(names: Iterable[str]) -> str:
+    """生成一次性采集所有 facts 的远程命令"""
+    lines = []
+    for name in names:
+        lines.append(
+            f"printf '{MARKER}\\t%s\\t%s\\n' {name} "
+            f"\"$( ({FACTS[name]}) 2>/dev/null | head -n 1)\""
+        )
+    # 统一交给 sh 执行，与远程用户的登录 shell 无关
+    return "sh -c " + shlex.quote("\n".join(lines))
+
+
+def parse_output(output: str) -> Dict[str, str]:
+    """解析远程输出，忽略 motd 等无关行"""
+    facts = {}
+    for line in output.splitlines():
+        parts = line.rstrip("\r").split("\t", 2)
+        if len(parts) == 3 and parts[0] == MARKER:
+            facts[parts[1]] = parts[2]
+    return facts
+
+
+class FactsCache:
+    """facts 磁盘缓存"""
+
+    def __init__(self, path: Optional[Path] = None, ttl: int = DEFAULT_TTL):
+        self.path = path or cache_dir() / "facts.json"
+        self.ttl = ttl
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries: Dict[str, dict] = json.load(f)
+        except (IOError, OSError, ValueError):
+            self._entries = {}
+
+    def is_fresh(self, key: str, names: Optional[Iterable[str]] = None) -> bool:
+        """names（默认为所有已注册的 fact）是否都在 TTL 内采集过"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        # 每个 fact 单独记录采集时间，部分采集不会刷新其他 fact
+        times = entry.get("times", {})
+        now = time.time()
+        return all(
+            name in times and now - times[name] < self.ttl for name in (names or FACTS)
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._entries.get(key)
+
+    def put(self, host_info: HostInfo, facts: Dict[str, str]):
+        now = time.time()
+        entry = self._entries.setdefault(host_info.key, {"facts": {}})
+        entry["gathered"] = now
+        entry["facts"].update(facts)
+        times = entry.setdefault("times", {})
+        for name in facts:
+            times[name] = now
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        return iter(sorted(self._entries.items()))
+
+    def save(self):
+        """原子写回磁盘"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=".facts-", dir=str(self.path.parent))
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self._entries, f, ensure_ascii=False, indent=1)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except (IOError, OSError) as e:
+            raise XSSHError(f"无法写入 facts 缓存: {e}")
+
+
+class FactGatherer:
+    """并发采集 facts"""
+
+    def __init__(
+        self,
+        hosts_manager,
+        reveal: Callable[[HostInfo], HostInfo],
+        jobs: int = DEFAULT_JOBS,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        # 解密可能需要交互输入主密码，串行化避免多个线程同时提示
+        lock = threading.Lock()
+
+        def locked_reveal(host_info):
+            with lock:
+                return reveal(host_info)
+
+        self.reveal = locked_reveal
+        self.jump = JumpChain(hosts_manager, locked_reveal)
+        self.jobs = jobs
+        self.timeout = timeout
+
+    def _gather_one(self, host_info: HostInfo, script: str) -> Dict[str, str]:
+        proxy_command = self.jump.prepare(host_info)
+        client = SSHClient(self.reveal(host_info), host_info.port, proxy_command)
+        result = client.run(script, timeout=self.timeout)
+        facts = parse_output(result.stdout)
+        if not facts:
+            detail = result.stderr.strip().splitlines()
+            raise SSHConnectionError(
+                f"退出码 {result.returncode}" + (f": {detail[-1]}" if detail else "")
+            )
+        return facts
+
+    def gather(
+        self, hosts: List[HostInfo], names: Optional[Iterable[str]] = None
+    ) -> Iterator[Tuple[HostInfo, Optional[Dict[str, str]], Optional[Exception]]]:
+        """按完成顺序返回 (host_info, facts, error)"""
+        if not hosts:
+            return
+        script = build_script(names or FACTS)
+        with ThreadPoolExecutor(max_workers=min(self.jobs, len(hosts))) as pool:
+            futures = {pool.submit(self._gather_one, h, script): h for h in hosts}
+            for future in as_completed(futures):
+                host_info = futures[future]
+                try:
+                    yield host_info, future.result(), None
+                except XSSHError as e:
+                    yield host_info, None, e
+
+
+_WHERE_RE = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)\s*(!=|>=|<=|~|=|>|<)\s*(.*)$")
+
+
+def parse_where(expr: str) -> Callable[[Dict[str, str]], bool]:
+    """
+    解析过滤条件
+
+    支持: name=value, name!=value, name~正则, name>数字, name<数字, name>=数字, name<=数字
+    """
+    m = _WHERE_RE.match(expr.strip())
+    if not m:
+        raise XSSHError(f"无效的过滤条件: {expr}")
+    name, op, value = m.groups()
+
+    if op == "~":
+        try:
+            pattern = re.compile(value)
+        except re.error as e:
+            raise XSSHError(f"无效的正则表达式 {value}: {e}")
+        return lambda facts: name in facts and bool(pattern.search(facts[name]))
+    if op == "=":
+        return lambda facts: facts.get(name) == value
+    if op == "!=":
+        return lambda facts: facts.get(name) != value
+
+    try:
+        number = float(value)
+    except ValueError:
+        raise XSSHError(f"比较运算需要数字: {expr}")
+    compare = {
+        ">": lambda a: a > number,
+        "<": lambda a: a < number,
+        ">=": lambda a: a >= number,
+        "<=": lambda a: a <= number,
+    }[op]
+
+    def predicate(facts):
+        try:
+            return compare(float(facts[name]))
+        except (KeyError, ValueError):
+            return False
+
+    return predicate
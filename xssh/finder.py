@@ -14,8 +14,33 @@ from xssh.exceptions import HostNotFoundError, UserNotFoundError, XSSHError
 class HostFinder:
     """主机查找器"""
 
-    def __init__(self, hosts_manager: HostsManager):
+    def __init__(self, hosts_manager: HostsManager, canonicalizer=None):
         self.hosts_manager = hosts_manager
+        self.canonicalizer = canonicalizer
+
+    def _resolve_host(self, host: str) -> Tuple[str, Optional[List[HostInfo]]]:
+        """
+        精确匹配 host，失败时通过规范化层按主机名 / IP 别名匹配
+
+        返回: (清单中的 host, 该 host 下的记录)
+        """
+        hosts = self.hosts_manager.find_by_host(host)
+        if hosts or self.canonicalizer is None:
+            return host, hosts
+
+        for alias in self.canonicalizer.lookup(host):
+            hosts = self.hosts_manager.find_by_host(alias)
+            if hosts:
+                return alias, hosts
+        return host, None
+
+    def _find_alias_user(self, host: str, user: str) -> Optional[HostInfo]:
+        """在 host 的所有别名中查找 user 的记录"""
+        for alias in self.canonicalizer.lookup(host):
+            host_info = self.hosts_manager.find_by_host_user(alias, user)
+            if host_info:
+                return host_info
+        return None
 
     def find(self, target) -> Tuple[HostInfo, int]:
         """
@@ -23,7 +48,7 @@ class HostFinder:
 
         返回: (host_info, effective_port)
         """
-        hosts = self.hosts_manager.find_by_host(target.host)
+        host, hosts = self._resolve_host(target.host)
 
         if not hosts:
             raise HostNotFoundError(
@@ -33,14 +58,18 @@ class HostFinder:
         # 情况1: 指定了 user
         if target.user:
             host_info = self.hosts_manager.find_by_host_user(
-                target.host,
+                host,
                 target.user
             )
 
+            # 该 host 下没有此用户时，在指向同一目标的其他别名中查找
+            if not host_info and self.canonicalizer is not None:
+                host_info = self._find_alias_user(target.host, target.user)
+
             if not host_info:
                 users = [h.user for h in hosts]
                 raise UserNotFoundError(
-                    f"主机 '{target.host}' 上未找到用户: {target.user}\n"
+                    f"主机 '{host}' 上未找到用户: {target.user}\n"
                     f"可用用户: {', '.join(users)}"
                 )
 
@@ -51,7 +80,7 @@ class HostFinder:
             return hosts[0], target.port or hosts[0].port
 
         # 情况3: 未指定 user，有多个用户 - 需要交互选择
-        raise MultipleUsersError(target.host, hosts)
+        raise MultipleUsersError(host, hosts)
 
 
 class MultipleUsersError(XSSHError):
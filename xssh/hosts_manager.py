@@ -5,10 +5,15 @@ CSV 主机信息管理模块
 """
 
 import csv
+import gc
+import os
+import tempfile
+import threading
 from pathlib import Path
 from typing import List, Dict, Optional
 
 from xssh.models import HostInfo
+from xssh.completion import CompletionCache
 from xssh.exceptions import (
     CSVFileNotFoundError,
     CSVFormatError,
@@ -20,16 +25,39 @@ from xssh.exceptions import (
 )
 
 
+class _IndexedHostInfo(HostInfo):
+    """从索引缓存恢复的记录：索引中不保存密码，首次访问 password 时从 CSV 读取"""
+
+    def __init__(self, *args, loader=None, **kwargs):
+        self._loader = loader
+        super().__init__(*args, **kwargs)
+
+    @property
+    def password(self) -> str:
+        if self._password is None:
+            self._password = self._loader(self)
+        return self._password
+
+    @password.setter
+    def password(self, value):
+        self._password = value
+
+
 class HostsManager:
     """主机信息管理器"""
 
     CSV_PATH = Path.home() / ".ssh" / "hosts.csv"
     REQUIRED_FIELDS = ["host", "port", "user", "password"]
+    OPTIONAL_FIELDS = ["jump"]
 
-    def __init__(self, csv_path: Optional[Path] = None):
+    def __init__(self, csv_path: Optional[Path] = None, index_cache=None):
         self.csv_path = csv_path or self.CSV_PATH
+        self.index_cache = index_cache
         self._hosts: Dict[str, List[HostInfo]] = {}
         self._host_user_map: Dict[str, HostInfo] = {}
+        # 记录来自索引缓存时按需读取的密码
+        self._passwords: Optional[Dict[str, str]] = None
+        self._passwords_lock = threading.Lock()
 
     def load(self) -> Dict[str, List[HostInfo]]:
         """加载 hosts.csv 文件"""
@@ -39,6 +67,16 @@ class HostsManager:
                 f"请先创建该文件并添加主机信息"
             )
 
+        # 文件未变化时直接使用缓存的解析结果
+        stamp = None
+        if self.index_cache is not None:
+            stamp = self.index_cache.stamp(self.csv_path)
+            self._passwords = None
+            rows = self.index_cache.get(self.csv_path, stamp)
+            if rows is not None:
+                self._load_index(rows)
+                return self._hosts
+
         with open(self.csv_path, 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
 
@@ -62,14 +100,89 @@ class HostsManager:
                 except (InvalidPortError, EmptyPasswordError) as e:
                     raise CSVFormatError(f"第 {row_num} 行: {e}")
 
+        if self.index_cache is not None:
+            self.index_cache.put(self.csv_path, stamp, list(self.iter_hosts()))
+
         return self._hosts
 
+    def _load_index(self, rows):
+        """
+        从索引缓存的 (host, port, user, jump) 列表恢复记录
+
+        写入缓存前已经检查过重复和字段格式，这里直接建立映射。
+        """
+        hosts: Dict[str, List[HostInfo]] = {}
+        host_user_map: Dict[str, HostInfo] = {}
+        new = _IndexedHostInfo.__new__
+        loader = self._read_password
+
+        # 大量创建对象时暂停分代回收，避免反复触发无用的 GC
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for host, port, user, jump in rows:
+                host_info = new(_IndexedHostInfo)
+                host_info.__dict__ = {
+                    "host": host, "port": port, "user": user, "jump": jump,
+                    "_password": None, "_loader": loader,
+                }
+                host_user_map[f"{user}@{host}"] = host_info
+                group = hosts.get(host)
+                if group is None:
+                    hosts[host] = [host_info]
+                else:
+                    group.append(host_info)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        self._hosts = hosts
+        self._host_user_map = host_user_map
+
+    def _read_password(self, host_info: HostInfo) -> str:
+        """
+        从 CSV 读取单条记录的密码（记录来自索引缓存时使用）
+
+        第一次调用时一次性读取该文件的所有密码，之后直接查表。
+        """
+        with self._passwords_lock:
+            if self._passwords is None:
+                self._passwords = self._read_passwords()
+        try:
+            return self._passwords[host_info.key]
+        except KeyError:
+            raise XSSHError(f"配置文件已变化，请重试: {self.csv_path}")
+
+    def _read_passwords(self) -> Dict[str, str]:
+        """读取文件中所有记录的密码，按 user@host 索引"""
+        passwords: Dict[str, str] = {}
+        try:
+            with open(self.csv_path, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                try:
+                    i_host, i_user, i_password = (
+                        header.index(name) for name in ('host', 'user', 'password')
+                    )
+                except ValueError:
+                    raise CSVFormatError(
+                        f"CSV 文件缺少必需字段: {', '.join(self.REQUIRED_FIELDS)}"
+                    )
+                for row in reader:
+                    if len(row) > max(i_host, i_user, i_password):
+                        key = f"{row[i_user].strip()}@{row[i_host].strip()}"
+                        passwords[key] = row[i_password].strip()
+        except (IOError, OSError) as e:
+            raise XSSHError(f"无法读取配置文件: {e}")
+        return passwords
+
     def _parse_row(self, row: dict) -> HostInfo:
         """解析单行数据"""
         host = row["host"].strip()
         port_str = row["port"].strip()
         user = row["user"].strip()
         password = row["password"].strip()
+        jump = (row.get("jump") or "").strip()
 
         # 验证字段
         if not host:
@@ -91,7 +204,8 @@ class HostsManager:
             host=host,
             port=port,
             user=user,
-            password=password
+            password=password,
+            jump=jump
         )
 
     def _add_host_info(self, host_info: HostInfo):
@@ -125,7 +239,11 @@ class HostsManager:
         """获取所有主机信息"""
         return self._hosts
 
-    def add(self, host: str, port: int, user: str, password: str):
+    def iter_hosts(self):
+        """按文件顺序遍历所有记录"""
+        return iter(self._host_user_map.values())
+
+    def add(self, host: str, port: int, user: str, password: str, jump: str = ""):
         """添加主机信息到 CSV"""
         try:
             # 确保目录存在
@@ -142,15 +260,29 @@ class HostsManager:
                 # 文件不存在，创建表头
                 with open(self.csv_path, 'w', encoding='utf-8', newline='') as f:
                     writer = csv.writer(f)
-                    writer.writerow(self.REQUIRED_FIELDS)
-
-            # 追加新记录
+                    writer.writerow(self.REQUIRED_FIELDS + (["jump"] if jump else []))
+
+            fieldnames = self._read_fieldnames()
+            if jump and "jump" not in fieldnames:
+                # 旧文件没有 jump 列，先补齐表头
+                fieldnames = fieldnames + ["jump"]
+                self._rewrite(fieldnames, self._read_rows())
+
+            # 追加新记录（按文件表头顺序）
+            record = {
+                "host": host,
+                "port": port,
+                "user": user,
+                "password": password,
+                "jump": jump,
+            }
             with open(self.csv_path, 'a', encoding='utf-8', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([host, port, user, password])
+                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+                writer.writerow(record)
 
             # 重新加载
             self.load()
+            self.refresh_completion()
         except (IOError, OSError) as e:
             raise XSSHError(f"无法写入配置文件: {e}")
 
@@ -163,17 +295,91 @@ class HostsManager:
                 raise UserNotFoundError(f"未找到主机信息: {user}@{host}")
 
             # 读取所有行，删除匹配的行
-            with open(self.csv_path, 'r', encoding='utf-8', newline='') as f:
-                reader = csv.DictReader(f)
-                rows = [row for row in reader if not (row['host'] == host and row['user'] == user)]
+            rows = [
+                row for row in self._read_rows()
+                if not (row['host'].strip() == host and row['user'].strip() == user)
+            ]
+
+            # 写回文件（保留原有的全部列）
+            self._rewrite(self._read_fieldnames(), rows)
 
-            # 写回文件
-            with open(self.csv_path, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=self.REQUIRED_FIELDS)
+            # 重新加载数据
+            self.load()
+            self.refresh_completion()
+        except (IOError, OSError) as e:
+            raise XSSHError(f"无法更新配置文件: {e}")
+
+    def _read_fieldnames(self) -> List[str]:
+        """读取文件表头"""
+        with open(self.csv_path, 'r', encoding='utf-8', newline='') as f:
+            return list(csv.DictReader(f).fieldnames or self.REQUIRED_FIELDS)
+
+    def _read_rows(self) -> List[dict]:
+        """读取所有原始行"""
+        with open(self.csv_path, 'r', encoding='utf-8', newline='') as f:
+            return list(csv.DictReader(f))
+
+    def _rewrite(self, fieldnames: List[str], rows: List[dict]):
+        """通过临时文件原子写回整个文件（保留原文件权限）"""
+        fd, tmp_path = tempfile.mkstemp(prefix='.xssh-', dir=str(self.csv_path.parent))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames, restval='')
                 writer.writeheader()
                 writer.writerows(rows)
+            os.chmod(tmp_path, self.csv_path.stat().st_mode & 0o777)
+            os.replace(tmp_path, self.csv_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def refresh_completion(self):
+        """重建补全缓存（失败不影响主流程）"""
+        try:
+            CompletionCache(self.csv_path).refresh(self)
+        except XSSHError:
+            pass
 
-            # 重新加载数据
+    def find_encrypted_password(self) -> Optional[str]:
+        """返回文件中第一个已加密的 password 字段（文件不存在或没有密文时为 None）"""
+        from xssh.crypto import is_encrypted
+
+        if not self.csv_path.exists():
+            return None
+        try:
+            for row in self._read_rows():
+                password = (row.get('password') or '').strip()
+                if is_encrypted(password):
+                    return password
+        except (IOError, OSError) as e:
+            raise XSSHError(f"无法读取配置文件: {e}")
+        return None
+
+    def encrypt_passwords(self, encrypt) -> int:
+        """
+        将所有明文密码替换为 encrypt(password) 的结果
+
+        返回被加密的记录数
+        """
+        from xssh.crypto import is_encrypted
+
+        try:
             self.load()
+
+            fieldnames = self._read_fieldnames()
+            rows = self._read_rows()
+
+            count = 0
+            for row in rows:
+                password = row['password'].strip()
+                if not is_encrypted(password):
+                    row['password'] = encrypt(password)
+                    count += 1
+
+            if count:
+                self._rewrite(fieldnames, rows)
+                self.load()
+
+            return count
         except (IOError, OSError) as e:
             raise XSSHError(f"无法更新配置文件: {e}")
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多来源主机清单模块
+
+支持同时加载多个 CSV 来源并合并为一个视图：
+
+* 命令行多次指定 `-i FILE`（也可以指定目录，加载其中的 *.csv）
+* 未指定 `-i` 时依次加载: XSSH_HOSTS 环境变量中的路径列表、
+  ~/.ssh/hosts.csv、~/.ssh/hosts.d/*.csv（按文件名排序）
+
+排在前面的来源优先级更高：同一个 user@host 出现在多个文件中时，以先出现
+的为准，其余记录作为跨文件重复被记录下来。每个来源独立解析，并按文件
+(mtime, size) 在磁盘上缓存解析结果，修改一个文件只会重新解析该文件。
+"""
+
+import dataclasses
+import hashlib
+import json
+import marshal
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from xssh.models import HostInfo
+from xssh.hosts_manager import HostsManager
+from xssh.exceptions import CSVFileNotFoundError
+
+HOSTS_DIR = Path.home() / ".ssh" / "hosts.d"
+INDEX_VERSION = 3
+PRUNE_INTERVAL = 86400
+
+
+def cache_dir() -> Path:
+    """xssh 缓存目录（遵循 XDG_CACHE_HOME）"""
+    base = os.environ.get("XDG_CACHE_HOME")
+    return (Path(base) if base else Path.home() / ".cache") / "xssh"
+
+
+class IndexCache:
+    """
+    单个 CSV 来源的解析结果缓存
+
+    每个来源一个文件：第一行为 JSON 头（版本、来源路径、文件版本标识），
+    其后为 marshal 序列化的 (host, port, user, jump) 元组列表，加载速度
+    远快于重新解析 CSV。缓存中不包含 password 字段，连接时只从 CSV 读取
+    选中记录的密码。
+    """
+
+    FIELDS = [f.name for f in dataclasses.fields(HostInfo) if f.name != "password"]
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = directory or cache_dir() / "index"
+
+    def _entry_path(self, csv_path: Path) -> Path:
+        digest = hashlib.sha1(str(csv_path.resolve()).encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.idx"
+
+    @staticmethod
+    def stamp(csv_path: Path) -> Tuple[int, int]:
+        """文件版本标识 (mtime_ns, size)"""
+        st = csv_path.stat()
+        return st.st_mtime_ns, st.st_size
+
+    @staticmethod
+    def _read_header(f) -> dict:
+        header = json.loads(f.readline())
+        if not isinstance(header, dict):
+            raise ValueError("invalid index header")
+        return header
+
+    def get(self, csv_path: Path, stamp: Tuple[int, int]) -> Optional[List[tuple]]:
+        """
+        读取缓存的 (host, port, user, jump) 列表，文件已变化或缓存不可用时返回 None
+        """
+        entry_path = self._entry_path(csv_path)
+        try:
+            with open(entry_path, "rb") as f:
+                header = self._read_header(f)
+                if (
+                    header.get("version") != INDEX_VERSION
+                    or header.get("fields") != self.FIELDS
+                    or header.get("path") != str(csv_path.resolve())
+                    or header.get("stamp") != list(stamp)
+                ):
+                    return None
+                rows = marshal.loads(f.read())
+        except (IOError, OSError, ValueError, EOFError, TypeError):
+            return None
+        return rows if isinstance(rows, list) else None
+
+    def put(self, csv_path: Path, stamp: Tuple[int, int], hosts: Sequence[HostInfo]):
+        """写入缓存（失败时静默忽略）"""
+        header = {
+            "version": INDEX_VERSION,
+            "path": str(csv_path.resolve()),
+            "stamp": list(stamp),
+            "fields": self.FIELDS,
+        }
+        rows = [(h.host, h.port, h.user, h.jump) for h in hosts]
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True, mode=0o700)
+            fd, tmp = tempfile.mkstemp(prefix=".index-", dir=str(self.directory))
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+                    f.write(marshal.dumps(rows))
+                os.replace(tmp, self._entry_path(csv_path))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except (IOError, OSError):
+            pass
+        self.maybe_prune()
+
+    def maybe_prune(self):
+        """缓存版本变化或距上次清理超过 PRUNE_INTERVAL 时清理"""
+        marker = self.directory / ".pruned"
+        try:
+            if (
+                marker.read_text(encoding="utf-8").strip() == str(INDEX_VERSION)
+                and time.time() - marker.stat().st_mtime < PRUNE_INTERVAL
+            ):
+                return
+        except (IOError, OSError):
+            pass
+        self.prune()
+        try:
+            marker.write_text(str(INDEX_VERSION), encoding="utf-8")
+        except (IOError, OSError):
+            pass
+
+    def prune(self):
+        """删除来源文件已不存在或版本过旧的缓存（只读取每个文件的头部）"""
+        try:
+            entries = list(self.directory.iterdir())
+        except OSError:
+            return
+        for entry_path in entries:
+            if entry_path.suffix == ".json":
+                # 旧版本的缓存（其中可能包含密码）
+                self._unlink(entry_path)
+                continue
+            if entry_path.suffix != ".idx":
+                continue
+            try:
+                with open(entry_path, "rb") as f:
+                    header = self._read_header(f)
+                if header.get("version") == INDEX_VERSION and Path(header["path"]).exists():
+                    continue
+            except (IOError, OSError, ValueError, KeyError, TypeError):
+                pass
+            self._unlink(entry_path)
+
+    @staticmethod
+    def _unlink(path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _expand(path: Path) -> List[Path]:
+    """目录展开为其中的 *.csv 文件"""
+    if path.is_dir():
+        return sorted(p for p in path.glob("*.csv") if p.is_file())
+    return [path]
+
+
+def resolve_sources(config_paths: Optional[Sequence] = None) -> List[Path]:
+    """
+    解析来源列表（按优先级从高到低）
+
+    指定了 config_paths 时只使用这些路径，文件必须存在；否则使用默认来源，
+    不存在的默认来源会被跳过。
+    """
+    if config_paths:
+        sources = []
+        for p in config_paths:
+            path = Path(p).expanduser()
+            if not path.exists():
+                raise CSVFileNotFoundError(
+                    f"hosts.csv 文件不存在: {path}\n"
+                    f"请先创建该文件并添加主机信息"
+                )
+            sources.extend(_expand(path))
+        return sources
+
+    sources = []
+    for p in os.environ.get("XSSH_HOSTS", "").split(os.pathsep):
+        if p:
+            sources.extend(_expand(Path(p).expanduser()))
+    sources.append(HostsManager.CSV_PATH)
+    sources.extend(_expand(HOSTS_DIR))
+
+    # 去重并跳过不存在的默认来源
+    seen = set()
+    result = []
+    for path in sources:
+        key = path.resolve() if path.exists() else None
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+        result.append(path)
+    return result
+
+
+class Inventory:
+    """多来源合并后的主机清单，接口与 HostsManager 的查询部分一致"""
+
+    def __init__(
+        self,
+        config_paths: Optional[Sequence] = None,
+        index_cache: Optional[IndexCache] = None,
+    ):
+        self.config_paths = list(config_paths) if config_paths else []
+        self.index_cache = index_cache if index_cache is not None else IndexCache()
+        self.managers: List[HostsManager] = []
+        # 被覆盖的跨文件重复记录: (被覆盖的记录, 生效来源, 被覆盖来源)
+        self.duplicates: List[Tuple[HostInfo, Path, Path]] = []
+        self._hosts: Dict[str, List[HostInfo]] = {}
+        self._host_user_map: Dict[str, HostInfo] = {}
+
+    @property
+    def primary_path(self) -> Path:
+        """写操作（add/encrypt/sync 等）的目标文件"""
+        if self.config_paths:
+            path = Path(self.config_paths[0]).expanduser()
+            if path.is_dir():
+                files = _expand(path)
+                return files[0] if files else path / "hosts.csv"
+            return path
+        # 未指定 -i 时为优先级最高的现有来源（XSSH_HOSTS 优先）
+        sources = resolve_sources()
+        return sources[0] if sources else HostsManager.CSV_PATH
+
+    def load(self) -> Dict[str, List[HostInfo]]:
+        """加载并合并所有来源"""
+        sources = resolve_sources(self.config_paths)
+        if not sources:
+            raise CSVFileNotFoundError(
+                f"hosts.csv 文件不存在: {HostsManager.CSV_PATH}\n"
+                f"请先创建该文件并添加主机信息"
+            )
+
+        self.managers = []
+        self.duplicates = []
+        self._hosts = {}
+        self._host_user_map = {}
+
+        for path in sources:
+            manager = HostsManager(path, index_cache=self.index_cache)
+            manager.load()
+            self.managers.append(manager)
+
+            if not self._host_user_map:
+                # 第一个来源不会有跨文件重复，直接复制映射（分组列表与
+                # manager 共享，后续来源追加时创建新列表）
+                self._host_user_map = dict(manager._host_user_map)
+                self._hosts = dict(manager._hosts)
+                continue
+
+            for host_info in manager.iter_hosts():
+                key = host_info.key
+                if key in self._host_user_map:
+                    self.duplicates.append(
+                        (host_info, self.source_of(self._host_user_map[key]), path)
+                    )
+                    continue
+                self._host_user_map[key] = host_info
+                self._hosts[host_info.host] = self._hosts.get(host_info.host, []) + [host_info]
+
+        return self._hosts
+
+    @property
+    def sources(self) -> List[Path]:
+        return [m.csv_path for m in self.managers]
+
+    def source_of(self, host_info: HostInfo) -> Optional[Path]:
+        """记录所在的来源文件"""
+        for manager in self.managers:
+            if manager.find_by_host_user(host_info.host, host_info.user) is not None:
+                return manager.csv_path
+        return None
+
+    def find_by_host(self, host: str) -> Optional[List[HostInfo]]:
+        """根据主机名查找所有用户"""
+        return self._hosts.get(host)
+
+    def find_by_host_user(self, host: str, user: str) -> Optional[HostInfo]:
+        """根据 host 和 user 精确查找"""
+        return self._host_user_map.get(f"{user}@{host}")
+
+    def get_all_hosts(self) -> Dict[str, List[HostInfo]]:
+        """获取所有主机信息"""
+        return self._hosts
+
+    def iter_hosts(self):
+        """按来源优先级遍历所有生效的记录"""
+        return iter(self._host_user_map.values())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跳板机（ProxyJump）模块
+
+hosts.csv 可选的 jump 列引用清单中的其他记录，格式与 ProxyJump 相同：
+`user@host[:port]`，多级跳板用逗号分隔（例如 "ops@bastion1,ops@bastion2"），
+被引用的记录自身的 jump 列也会被递归展开。跳板机的密码取自清单。
+
+每个跳板机只建立一条由 OpenSSH ControlMaster 复用的持久连接（ControlPersist），
+目标连接通过 `ssh -W` 经由该复用连接转发，同一跳板机后的多个会话不再重复
+握手和认证。多级跳板中后一级的复用连接经由前一级建立。
+"""
+
+import hashlib
+import shlex
+import subprocess
+import tempfile
+from dataclasses import replace
+from pathlib import Path
+from typing import List, Optional
+
+from xssh.models import HostInfo
+from xssh.parser import TargetParser
+from xssh.exceptions import JumpHostError, XSSHError
+
+CONTROL_DIR = Path.home() / ".ssh" / "xssh-mux"
+CONTROL_PERSIST = 600
+CONNECT_TIMEOUT = 15
+
+SSH_OPTIONS = [
+    "-o", "StrictHostKeyChecking=no",
+    "-o", "UserKnownHostsFile=/dev/null",
+]
+
+
+class JumpResolver:
+    """把 jump 列展开为按顺序排列的跳板机列表"""
+
+    def __init__(self, hosts_manager):
+        self.hosts_manager = hosts_manager
+
+    def _lookup(self, ref: str) -> HostInfo:
+        target = TargetParser.parse(ref)
+        hosts = self.hosts_manager.find_by_host(target.host)
+        if not hosts:
+            raise JumpHostError(f"跳板机不在清单中: {ref}")
+
+        if target.user:
+            hop = self.hosts_manager.find_by_host_user(target.host, target.user)
+            if not hop:
+                raise JumpHostError(f"跳板机不在清单中: {ref}")
+        elif len(hosts) == 1:
+            hop = hosts[0]
+        else:
+            raise JumpHostError(f"跳板机 {ref} 有多个用户，请使用 user@host 指定")
+
+        if target.port:
+            hop = replace(hop, port=target.port)
+        return hop
+
+    def chain(self, host_info: HostInfo, _visiting: Optional[List[str]] = None) -> List[HostInfo]:
+        """
+        返回到达 host_info 需要依次经过的跳板机（第一个为最外层）
+        """
+        visiting = (_visiting or []) + [host_info.key]
+        hops: List[HostInfo] = []
+
+        for ref in filter(None, (r.strip() for r in host_info.jump.split(","))):
+            hop = self._lookup(ref)
+            if hop.key in visiting:
+                raise JumpHostError(
+                    f"跳板机存在循环引用: {' -> '.join(visiting + [hop.key])}"
+                )
+            for upstream in self.chain(hop, visiting) + [hop]:
+                if all(str(h) != str(upstream) for h in hops):
+                    hops.append(upstream)
+
+        return hops
+
+
+class ControlMaster:
+    """跳板机复用连接管理"""
+
+    def __init__(self, control_dir: Optional[Path] = None, persist: int = CONTROL_PERSIST):
+        self.control_dir = control_dir or CONTROL_DIR
+        self.persist = persist
+
+    def control_path(self, hop: HostInfo) -> Path:
+        # Unix socket 路径长度有限，使用哈希作为文件名
+        digest = hashlib.sha1(str(hop).encode("utf-8")).hexdigest()[:16]
+        return self.control_dir / digest
+
+    def _mux_options(self, hop: HostInfo) -> List[str]:
+        return ["-o", f"ControlPath={self.control_path(hop)}", "-p", str(hop.port)]
+
+    @staticmethod
+    def remove_socket(path: Path):
+        """删除残留的控制 socket（master 异常退出后文件仍在，ssh 会拒绝复用）"""
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def is_alive(self, hop: HostInfo) -> bool:
+        """复用连接是否存在"""
+        if not self.control_path(hop).exists():
+            return False
+        result = subprocess.run(
+            ["ssh", "-O", "check", *self._mux_options(hop), f"{hop.user}@{hop.host}"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return result.returncode == 0
+
+    def proxy_command(self, hop: HostInfo) -> str:
+        """经由 hop 复用连接转发的 ProxyCommand（不会触发认证）"""
+        return shlex.join([
+            "ssh",
+            "-o", "ControlMaster=no",
+            "-o", "BatchMode=yes",
+            *self._mux_options(hop),
+            "-W", "%h:%p",
+            f"{hop.user}@{hop.host}",
+        ])
+
+    def ensure(self, hop: HostInfo, upstream: Optional[HostInfo], reveal):
+        """
+        确保 hop 的复用连接存在
+
+        upstream 为上一级跳板机；reveal(hop) 返回密码已解密的 HostInfo，
+        只在需要新建连接时才调用。
+        """
+        import fcntl
+
+        self.control_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+        lock_path = self.control_path(hop).with_suffix(".lock")
+
+        # 并发会话共用同一个跳板机时，只允许一个进程建立复用连接
+        with open(lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if self.is_alive(hop):
+                return
+            self.remove_socket(self.control_path(hop))
+
+            cmd = [
+                "sshpass", "-p", reveal(hop).password,
+                "ssh", "-f", "-N",
+                "-o", "ControlMaster=yes",
+                "-o", f"ControlPersist={self.persist}",
+                "-o", f"ConnectTimeout={CONNECT_TIMEOUT}",
+                *SSH_OPTIONS,
+                *self._mux_options(hop),
+            ]
+            if upstream is not None:
+                cmd += ["-o", f"ProxyCommand={self.proxy_command(upstream)}"]
+            cmd.append(f"{hop.user}@{hop.host}")
+
+            # 后台的 master 进程会继承 stderr，使用临时文件避免管道阻塞
+            with tempfile.TemporaryFile() as err:
+                try:
+                    result = subprocess.run(
+                        cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=err
+                    )
+                except FileNotFoundError:
+                    raise XSSHError("sshpass 未找到，请先安装 sshpass")
+                if result.returncode != 0:
+                    err.seek(0)
+                    detail = err.read().decode("utf-8", "replace").strip()
+                    raise JumpHostError(f"无法连接跳板机 {hop}: {detail}")
+
+    def close(self, hop: HostInfo):
+        """关闭 hop 的复用连接"""
+        subprocess.run(
+            ["ssh", "-O", "exit", *self._mux_options(hop), f"{hop.user}@{hop.host}"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+
+class JumpChain:
+    """为目标主机准备跳板机连接"""
+
+    def __init__(self, hosts_manager, reveal, master: Optional[ControlMaster] = None):
+        self.resolver = JumpResolver(hosts_manager)
+        self.reveal = reveal
+        self.master = master or ControlMaster()
+
+    def prepare(self, host_info: HostInfo) -> Optional[str]:
+        """建立（或复用）所有跳板机连接，返回目标连接使用的 ProxyCommand"""
+        hops = self.resolver.chain(host_info)
+        if not hops:
+            return None
+
+        upstream = None
+        for hop in hops:
+            self.master.ensure(hop, upstream, self.reveal)
+            upstream = hop
+        return self.master.proxy_command(hops[-1])
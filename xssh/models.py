@@ -8,13 +8,14 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+@dataclass(eq=False)
 class HostInfo:
-    """主机信息"""
+    """主机信息（按 user@host 判断是否为同一条记录）"""
     host: str
     port: int
     user: str
     password: str
+    jump: str = ""
 
     def __str__(self):
         return f"{self.user}@{self.host}:{self.port}"
@@ -22,6 +23,14 @@ class HostInfo:
     def __repr__(self):
         return f"HostInfo(host={self.host}, port={self.port}, user={self.user})"
 
+    def __eq__(self, other):
+        if not isinstance(other, HostInfo):
+            return NotImplemented
+        return self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
     @property
     def key(self):
         """唯一标识 (host, user)"""
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话录制与回放模块
+
+录制时 ssh 运行在一个伪终端中，由 PtyRelay 在本地终端与伪终端之间转发数据。
+输出数据先原样写回终端，再以 (时间, 数据) 的形式追加到有界环形缓冲区，
+由后台线程批量解码并写入 asciicast v2 文件，转发路径上没有磁盘 I/O 和
+JSON 编码，录制不会拖慢按键回显。缓冲区写满时丢弃最旧的数据而不是阻塞，
+丢弃数量记录在文件末尾的标记事件中。
+
+出于安全考虑只录制输出（以及窗口大小变化），不录制键盘输入。
+"""
+
+import codecs
+import collections
+import json
+import os
+import select
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from xssh.exceptions import XSSHError
+
+RING_SIZE = 1024
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 0.2
+READ_SIZE = 65536
+
+
+class RingBuffer:
+    """有界环形缓冲区，写满时丢弃最旧的数据，写入永不阻塞"""
+
+    def __init__(self, size: int = RING_SIZE):
+        self._items = collections.deque(maxlen=size)
+        self.dropped = 0
+
+    def put(self, item):
+        # deque 的 append/popleft 是线程安全的
+        if len(self._items) == self._items.maxlen:
+            self.dropped += 1
+        self._items.append(item)
+
+    def drain(self) -> list:
+        items = []
+        try:
+            while True:
+                items.append(self._items.popleft())
+        except IndexError:
+            pass
+        return items
+
+    def __len__(self):
+        return len(self._items)
+
+
+class CastWriter:
+    """asciicast v2 后台批量写入器"""
+
+    def __init__(self, path: Path, ring_size: int = RING_SIZE):
+        self.path = path
+        self.ring = RingBuffer(ring_size)
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self._start = 0.0
+
+    def start(self, width: int, height: int, title: str = ""):
+        try:
+            self._file = open(self.path, "w", encoding="utf-8")
+        except (IOError, OSError) as e:
+            raise XSSHError(f"无法创建录制文件: {e}")
+
+        self._start = time.monotonic()
+        header = {
+            "version": 2,
+            "width": width,
+            "height": height,
+            "timestamp": int(time.time()),
+            "env": {"TERM": os.environ.get("TERM", ""), "SHELL": os.environ.get("SHELL", "")},
+        }
+        if title:
+            header["title"] = title
+        self._file.write(json.dumps(header, ensure_ascii=False) + "\n")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def output(self, data: bytes):
+        """记录一段输出（在转发路径上调用，只做一次追加）"""
+        self.ring.put((time.monotonic(), "o", data))
+        if len(self.ring) >= BATCH_SIZE:
+            self._wakeup.set()
+
+    def resize(self, width: int, height: int):
+        self.ring.put((time.monotonic(), "r", f"{width}x{height}"))
+
+    def _write(self, events):
+        lines = []
+        for t, kind, data in events:
+            if kind == "o":
+                data = self._decoder.decode(data)
+                if not data:
+                    continue
+            lines.append(
+                json.dumps([round(t - self._start, 6), kind, data], ensure_ascii=False)
+            )
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            self._write(self.ring.drain())
+
+    def close(self):
+        """写入剩余数据并关闭文件"""
+        if self._thread is None:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self._write(self.ring.drain())
+
+        now = round(time.monotonic() - self._start, 6)
+        tail = self._decoder.decode(b"", final=True)
+        if tail:
+            self._file.write(json.dumps([now, "o", tail], ensure_ascii=False) + "\n")
+        if self.ring.dropped:
+            marker = f"xssh: 缓冲区已满，丢弃了 {self.ring.dropped} 段输出"
+            self._file.write(json.dumps([now, "m", marker], ensure_ascii=False) + "\n")
+        self._file.close()
+        self._thread = None
+
+
+def _get_winsize(fd: int):
+    import fcntl
+    import termios
+
+    try:
+        data = fcntl.ioctl(fd, termios.TIOCGWINSZ, b"\0" * 8)
+        rows, cols = struct.unpack("hhhh", data)[:2]
+        if rows and cols:
+            return cols, rows
+    except OSError:
+        pass
+    return 80, 24
+
+
+def _set_winsize(fd: int, cols: int, rows: int):
+    import fcntl
+    import termios
+
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("hhhh", rows, cols, 0, 0))
+
+
+class PtyRelay:
+    """在伪终端中运行命令，并在本地终端与伪终端之间转发数据"""
+
+    def __init__(
+        self,
+        cmd: List[str],
+        writer: Optional[CastWriter] = None,
+        stdin_fd: int = 0,
+        stdout_fd: int = 1,
+    ):
+        self.cmd = cmd
+        self.writer = writer
+        self.stdin_fd = stdin_fd
+        self.stdout_fd = stdout_fd
+        self._master = -1
+
+    def _on_winch(self, signum, frame):
+        cols, rows = _get_winsize(self.stdin_fd)
+        try:
+            _set_winsize(self._master, cols, rows)
+        except OSError:
+            return
+        if self.writer:
+            self.writer.resize(cols, rows)
+
+    def _spawn(self, slave: int) -> subprocess.Popen:
+        import fcntl
+        import termios
+
+        def set_ctty():
+            os.setsid()
+            fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+
+        return subprocess.Popen(
+            self.cmd, stdin=slave, stdout=slave, stderr=slave, preexec_fn=set_ctty
+        )
+
+    def _write_all(self, fd: int, data: bytes):
+        while data:
+            n = os.write(fd, data)
+            data = data[n:]
+
+    def run(self, title: str = "") -> int:
+        """运行命令直至结束，返回退出码"""
+        import pty
+        import termios
+        import tty
+
+        cols, rows = _get_winsize(self.stdin_fd)
+        self._master, slave = pty.openpty()
+        _set_winsize(self._master, cols, rows)
+
+        old_settings = None
+        if os.isatty(self.stdin_fd):
+            old_settings = termios.tcgetattr(self.stdin_fd)
+            tty.setraw(self.stdin_fd)
+        old_winch = signal.signal(signal.SIGWINCH, self._on_winch)
+
+        if self.writer:
+            self.writer.start(cols, rows, title)
+        try:
+            process = self._spawn(slave)
+            os.close(slave)
+            self._loop()
+            return process.wait()
+        finally:
+            signal.signal(signal.SIGWINCH, old_winch)
+            if old_settings is not None:
+                termios.tcsetattr(self.stdin_fd, termios.TCSADRAIN, old_settings)
+            os.close(self._master)
+            if self.writer:
+                self.writer.close()
+
+    def _loop(self):
+        master = self._master
+        fds = [self.stdin_fd, master]
+        writer = self.writer
+        while True:
+            readable, _, _ = select.select(fds, [], [])
+            if master in readable:
+                try:
+                    data = os.read(master, READ_SIZE)
+                except OSError:
+                    # 子进程退出后读取伪终端返回 EIO
+                    return
+                if not data:
+                    return
+                # 先回显，再交给后台写入器
+                self._write_all(self.stdout_fd, data)
+                if writer:
+                    writer.output(data)
+            if self.stdin_fd in readable:
+                data = os.read(self.stdin_fd, READ_SIZE)
+                if data:
+                    self._write_all(master, data)
+                else:
+                    fds.remove(self.stdin_fd)
+
+
+def replay(path: Path, speed: float = 1.0, max_idle: Optional[float] = None, out=None):
+    """按原始节奏回放 asciicast 文件"""
+    out = out or sys.stdout
+    try:
+        f = open(path, "r", encoding="utf-8")
+    except (IOError, OSError) as e:
+        raise XSSHError(f"无法打开录制文件: {e}")
+
+    with f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            raise XSSHError(f"不是有效的录制文件: {path}")
+        if header.get("version") != 2:
+            raise XSSHError(f"不支持的录制文件版本: {header.get('version')}")
+
+        last = 0.0
+        for line in f:
+            try:
+                t, kind, data = json.loads(line)
+            except ValueError:
+                continue
+            delay = t - last
+            if max_idle is not None:
+                delay = min(delay, max_idle)
+            if delay > 0:
+                time.sleep(delay / speed)
+            last = t
+            if kind == "o":
+                out.write(data)
+                out.flush()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+主机名 / IP 规范化模块
+
+可选的匹配层：把清单中的主机名批量解析（线程池并发）并把正向、反向结果
+连同 TTL 缓存到磁盘，再以「名称或地址 -> 清单中的 host」建立二级索引，
+从而 `xssh root@db01` 可以匹配清单中的 `10.1.2.3`，反之亦然。
+
+连接时清单一侧只读缓存（即使已过期），批量刷新由 `xssh resolve` 完成；
+目标名称从未解析过或缓存已过期时只重新解析这一个名字。
+"""
+
+import ipaddress
+import json
+import os
+import socket
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from xssh.inventory import cache_dir
+
+DEFAULT_TTL = 86400
+NEGATIVE_TTL = 300
+DEFAULT_WORKERS = 32
+
+# 解析函数: 查询名 -> (名称列表, 地址列表)
+Resolver = Callable[[str], Tuple[List[str], List[str]]]
+
+
+def is_address(value: str) -> bool:
+    """判断是否为 IP 地址"""
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+def system_resolver(query: str) -> Tuple[List[str], List[str]]:
+    """使用系统解析器（/etc/hosts、DNS 等）"""
+    try:
+        if is_address(query):
+            name, aliases, addrs = socket.gethostbyaddr(query)
+        else:
+            name, aliases, addrs = socket.gethostbyname_ex(query)
+    except (socket.herror, socket.gaierror, UnicodeError, OSError):
+        return [], []
+    return [name] + aliases, addrs
+
+
+class HostsFileResolver:
+    """从 hosts 格式文件解析（用于测试或离线环境）"""
+
+    def __init__(self, path: Path):
+        self.by_name: Dict[str, List[str]] = {}
+        self.by_addr: Dict[str, List[str]] = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                fields = line.split("#", 1)[0].split()
+                if len(fields) < 2:
+                    continue
+                addr, names = fields[0], fields[1:]
+                self.by_addr.setdefault(addr, []).extend(names)
+                for name in names:
+                    self.by_name.setdefault(name, []).append(addr)
+
+    def __call__(self, query: str) -> Tuple[List[str], List[str]]:
+        if query in self.by_addr:
+            return list(self.by_addr[query]), [query]
+        addrs = self.by_name.get(query, [])
+        names = []
+        for addr in addrs:
+            names.extend(n for n in self.by_addr[addr] if n not in names)
+        return names, list(addrs)
+
+
+class DNSCache:
+    """带 TTL 的磁盘解析缓存"""
+
+    def __init__(self, path: Optional[Path] = None, ttl: int = DEFAULT_TTL):
+        self.path = path or cache_dir() / "dns.json"
+        self.ttl = ttl
+        self._entries: Dict[str, dict] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (IOError, OSError, ValueError):
+            self._entries = {}
+
+    def get(self, query: str, allow_stale: bool = True) -> Optional[dict]:
+        """返回缓存条目 {"names", "addrs", "expires"}，不存在时返回 None"""
+        entry = self._entries.get(query)
+        if entry is None:
+            return None
+        if not allow_stale and entry["expires"] < time.time():
+            return None
+        return entry
+
+    def put(self, query: str, names: List[str], addrs: List[str]):
+        ttl = self.ttl if (names or addrs) else NEGATIVE_TTL
+        self._entries[query] = {
+            "names": names,
+            "addrs": addrs,
+            "expires": time.time() + ttl,
+        }
+        self._dirty = True
+
+    def stale(self, queries: Iterable[str]) -> List[str]:
+        """返回缺失或已过期的查询"""
+        now = time.time()
+        return [
+            q for q in queries
+            if q not in self._entries or self._entries[q]["expires"] < now
+        ]
+
+    def save(self):
+        """原子写回磁盘"""
+        if not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=".dns-", dir=str(self.path.parent))
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self._entries, f, separators=(",", ":"))
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            self._dirty = False
+        except (IOError, OSError):
+            pass
+
+
+def bulk_resolve(
+    queries: Iterable[str],
+    cache: DNSCache,
+    resolver: Resolver = system_resolver,
+    workers: int = DEFAULT_WORKERS,
+) -> int:
+    """并发解析并写入缓存，返回解析的数量"""
+    queries = list(dict.fromkeys(queries))
+    if not queries:
+        return 0
+    with ThreadPoolExecutor(max_workers=min(workers, len(queries))) as pool:
+        for query, (names, addrs) in zip(queries, pool.map(resolver, queries)):
+            cache.put(query, names, addrs)
+    cache.save()
+    return len(queries)
+
+
+class Canonicalizer:
+    """名称 / 地址到清单 host 的二级索引"""
+
+    def __init__(
+        self,
+        hosts_manager,
+        cache: Optional[DNSCache] = None,
+        resolver: Resolver = system_resolver,
+    ):
+        self.hosts_manager = hosts_manager
+        self.cache = cache or DNSCache()
+        self.resolver = resolver
+        self._index: Optional[Dict[str, List[str]]] = None
+
+    def _aliases(self, query: str, entry: Optional[dict]) -> List[str]:
+        aliases = [query]
+        if entry:
+            aliases.extend(entry["names"])
+            aliases.extend(entry["addrs"])
+        return aliases
+
+    def _build_index(self) -> Dict[str, List[str]]:
+        """只使用已有缓存（包括已过期的条目）建立索引，不触发解析"""
+        index: Dict[str, List[str]] = {}
+        for host in self.hosts_manager.get_all_hosts():
+            for alias in self._aliases(host, self.cache.get(host)):
+                hosts = index.setdefault(alias, [])
+                if host not in hosts:
+                    hosts.append(host)
+        return index
+
+    def refresh(self, stale_only: bool = True, workers: int = DEFAULT_WORKERS) -> int:
+        """批量解析清单中的主机，返回解析的数量"""
+        hosts = list(self.hosts_manager.get_all_hosts())
+        if stale_only:
+            hosts = self.cache.stale(hosts)
+        count = bulk_resolve(hosts, self.cache, self.resolver, workers)
+        self._index = None
+        return count
+
+    def lookup(self, host: str) -> List[str]:
+        """返回与 host 指向同一目标的清单 host 列表"""
+        if self._index is None:
+            self._index = self._build_index()
+
+        entry = self.cache.get(host, allow_stale=False)
+        if entry is None:
+            # 目标从未解析过或已过期：只解析这一个名字
+            stale = self.cache.get(host)
+            names, addrs = self.resolver(host)
+            if names or addrs or not stale or not (stale["names"] or stale["addrs"]):
+                self.cache.put(host, names, addrs)
+                self.cache.save()
+                entry = self.cache.get(host)
+            else:
+                # 解析暂时失败时沿用过期的结果
+                entry = stale
+
+        result = []
+        for alias in self._aliases(host, entry):
+            for inventory_host in self._index.get(alias, []):
+                if inventory_host not in result:
+                    result.append(inventory_host)
+        return result
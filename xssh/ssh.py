@@ -6,22 +6,37 @@ SSH 连接模块
 
 import subprocess
 import sys
+from pathlib import Path
+from typing import Optional
 
 from xssh.models import HostInfo
-from xssh.exceptions import XSSHError
+from xssh.exceptions import XSSHError, SSHConnectionError
 
 
 class SSHClient:
     """SSH 客户端封装"""
 
-    def __init__(self, host_info: HostInfo, port: int):
+    CONNECT_TIMEOUT = 10
+
+    def __init__(
+        self,
+        host_info: HostInfo,
+        port: int,
+        proxy_command: Optional[str] = None,
+        record: Optional[Path] = None,
+    ):
         self.host_info = host_info
         self.port = port
+        self.proxy_command = proxy_command
+        self.record = record
 
     def connect(self):
         """建立 SSH 连接"""
         cmd = self._build_ssh_command()
 
+        if self.record:
+            sys.exit(self._connect_recorded(cmd))
+
         try:
             # 使用 subprocess 运行 ssh，确保终端控制正确
             import signal
@@ -76,18 +91,68 @@ class SSHClient:
         except Exception as e:
             raise XSSHError(f"SSH 连接失败: {e}")
 
-    def _build_ssh_command(self) -> list:
-        """构建 SSH 命令"""
-        return [
+    def _connect_recorded(self, cmd: list) -> int:
+        """经由伪终端转发运行 ssh 并录制会话，返回退出码"""
+        from xssh.recorder import CastWriter, PtyRelay
+
+        writer = CastWriter(self.record)
+        try:
+            return PtyRelay(cmd, writer).run(title=str(self.host_info))
+        except FileNotFoundError:
+            raise XSSHError("sshpass 未找到，请先安装 sshpass")
+        except OSError as e:
+            raise XSSHError(f"无法执行 SSH 命令: {e}")
+
+    def _build_ssh_command(self, remote_command: Optional[str] = None) -> list:
+        """
+        构建 SSH 命令
+
+        指定 remote_command 时构建非交互的远程执行命令（不分配伪终端）
+        """
+        cmd = [
             "sshpass",
             "-p", self.host_info.password,
             "ssh",
-            "-tt",  # 强制分配伪终端
+        ]
+        if remote_command is None:
+            cmd.append("-tt")  # 强制分配伪终端
+        else:
+            cmd += [
+                "-T",
+                "-o", "NumberOfPasswordPrompts=1",
+                "-o", f"ConnectTimeout={self.CONNECT_TIMEOUT}",
+            ]
+        cmd += [
             "-p", str(self.port),
             "-o", "StrictHostKeyChecking=no",
             "-o", "UserKnownHostsFile=/dev/null",
-            f"{self.host_info.user}@{self.host_info.host}"
         ]
+        if self.proxy_command:
+            # 经由跳板机复用连接转发
+            cmd += ["-o", f"ProxyCommand={self.proxy_command}"]
+        cmd.append(f"{self.host_info.user}@{self.host_info.host}")
+        if remote_command is not None:
+            cmd.append(remote_command)
+        return cmd
+
+    def run(self, remote_command: str, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """非交互执行远程命令，返回 CompletedProcess（stdout/stderr 为文本）"""
+        cmd = self._build_ssh_command(remote_command)
+        try:
+            return subprocess.run(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                text=True,
+                errors="replace",
+                timeout=timeout,
+            )
+        except FileNotFoundError:
+            raise XSSHError("sshpass 未找到，请先安装 sshpass")
+        except subprocess.TimeoutExpired:
+            raise SSHConnectionError(f"{self.host_info}: 执行超时 ({timeout} 秒)")
+        except OSError as e:
+            raise XSSHError(f"无法执行 SSH 命令: {e}")
 
     @classmethod
     def check_sshpass(cls) -> bool:
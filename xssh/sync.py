@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+主机清单对比与同步模块
+
+以 (host, user) 即 HostInfo.key 为键做哈希连接：先把来源文件 B 读入字典，
+再逐行流式扫描本地文件 A，单次遍历即可得到新增、删除和变更的记录，
+时间复杂度 O(len(A) + len(B))，内存只与 B 的大小相关。
+
+同步时在同一次扫描中把结果写入临时文件：未变化的行原样保留，变更的行
+只替换 B 中有的字段，最后追加新增记录，并通过 os.replace 原子替换本地文件。
+本地独有的记录默认保留，只有显式指定 prune 时才删除。来源文件的每一行
+在写入前都按 HostsManager 的规则校验，任何一行无效时不修改本地文件。
+"""
+
+import csv
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from xssh.hosts_manager import HostsManager
+from xssh.exceptions import (
+    CSVFileNotFoundError,
+    CSVFormatError,
+    DuplicateHostUserError,
+    XSSHError,
+)
+
+
+@dataclass
+class InventoryDiff:
+    """对比结果"""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    # (key, [(字段, 旧值, 新值), ...])
+    changed: List[Tuple[str, List[Tuple[str, str, str]]]] = field(default_factory=list)
+    unchanged: int = 0
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+
+def _open_reader(path: Path):
+    if not path.exists():
+        raise CSVFileNotFoundError(f"文件不存在: {path}")
+    f = open(path, "r", encoding="utf-8", newline="")
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if not header or not all(name in header for name in HostsManager.REQUIRED_FIELDS):
+        f.close()
+        raise CSVFormatError(
+            f"{path}: CSV 文件缺少必需字段: {', '.join(HostsManager.REQUIRED_FIELDS)}"
+        )
+    return f, reader, [name.strip() for name in header]
+
+
+def _check_length(path: Path, row_num: int, row: List[str], header: List[str]):
+    """行的字段数必须覆盖所有必需字段，且不能多于表头"""
+    required = max(header.index(name) for name in HostsManager.REQUIRED_FIELDS) + 1
+    if len(row) < required or len(row) > len(header):
+        raise CSVFormatError(
+            f"{path} 第 {row_num} 行: 字段数 ({len(row)}) 与表头 ({len(header)}) 不一致"
+        )
+
+
+def _index(path: Path) -> Tuple[List[str], Dict[str, List[str]]]:
+    """读取文件并按 user@host 建立索引，写入前校验每一行"""
+    f, reader, header = _open_reader(path)
+    host_i, user_i = header.index("host"), header.index("user")
+    parse_row = HostsManager()._parse_row
+    rows: Dict[str, List[str]] = {}
+    with f:
+        for row_num, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            _check_length(path, row_num, row, header)
+            try:
+                parse_row(dict(zip(header, row)))
+            except XSSHError as e:
+                raise CSVFormatError(f"{path} 第 {row_num} 行: {e}")
+            key = f"{row[user_i].strip()}@{row[host_i].strip()}"
+            if key in rows:
+                raise DuplicateHostUserError(
+                    f"{path} 第 {row_num} 行: 存在重复的 host+user 记录: {key}"
+                )
+            rows[key] = row
+    return header, rows
+
+
+def compare(
+    local: Path,
+    source: Path,
+    output=None,
+    keep_local: bool = False,
+) -> InventoryDiff:
+    """
+    对比 local 与 source
+
+    output 为 csv.writer 时，同时写出同步后的 local 内容；
+    keep_local 为 True 时保留 local 中 source 没有的记录。
+    """
+    src_header, src_rows = _index(source)
+    f, reader, header = _open_reader(local)
+
+    # 输出字段: local 原有字段 + source 新增的字段
+    out_header = header + [name for name in src_header if name not in header]
+    src_pos = {name: i for i, name in enumerate(src_header)}
+    host_i, user_i = header.index("host"), header.index("user")
+    diff = InventoryDiff()
+
+    if output is not None:
+        output.writerow(out_header)
+
+    with f:
+        for row_num, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            _check_length(local, row_num, row, header)
+            key = f"{row[user_i].strip()}@{row[host_i].strip()}"
+            src = src_rows.pop(key, None)
+
+            if src is None:
+                if keep_local:
+                    diff.unchanged += 1
+                    if output is not None:
+                        output.writerow(row + [""] * (len(out_header) - len(row)))
+                else:
+                    diff.removed.append(key)
+                continue
+
+            merged = row + [""] * (len(out_header) - len(row))
+            changes = []
+            for i, name in enumerate(out_header):
+                if name not in src_pos:
+                    continue
+                old = merged[i].strip()
+                new = src[src_pos[name]].strip() if src_pos[name] < len(src) else ""
+                if old != new:
+                    changes.append((name, old, new))
+                    merged[i] = new
+
+            if changes:
+                diff.changed.append((key, changes))
+            else:
+                diff.unchanged += 1
+
+            if output is not None:
+                output.writerow(merged)
+
+    # source 中剩余的即为新增记录
+    for key, src in src_rows.items():
+        diff.added.append(key)
+        if output is not None:
+            output.writerow(
+                [src[src_pos[name]] if name in src_pos else "" for name in out_header]
+            )
+
+    return diff
+
+
+def sync_file(
+    local: Path,
+    source: Path,
+    prune: bool = False,
+    dry_run: bool = False,
+) -> InventoryDiff:
+    """
+    将 source 的内容同步到 local，只应用必要的变更，一次原子写入
+
+    默认保留 local 中 source 没有的记录（手工维护的主机），prune 为 True 时删除。
+    """
+    keep_local = not prune
+    if dry_run:
+        return compare(local, source, keep_local=keep_local)
+
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=".xssh-sync-", dir=str(local.parent))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                diff = compare(local, source, csv.writer(f), keep_local=keep_local)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if diff:
+                os.chmod(tmp, local.stat().st_mode & 0o777)
+                os.replace(tmp, local)
+            else:
+                os.unlink(tmp)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+    except (IOError, OSError) as e:
+        raise XSSHError(f"无法更新配置文件: {e}")
+
+    return diff
+
+
+def format_diff(diff: InventoryDiff):
+    """生成对比结果的文本行（不输出密码值）"""
+    for key in diff.removed:
+        yield f"- {key}"
+    for key in diff.added:
+        yield f"+ {key}"
+    for key, changes in diff.changed:
+        parts = []
+        for name, old, new in changes:
+            if name == "password":
+                parts.append(name)
+            else:
+                parts.append(f"{name}: {old} -> {new}")
+        yield f"~ {key}  ({', '.join(parts)})"
@@ -0,0 +1,604 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端口转发隧道管理模块
+
+隧道声明保存在 ~/.ssh/tunnels.csv（name,target,type,listen,dest），target
+引用清单中的 user@host[:port]。启动后由一个后台监督进程统一管理：
+
+* 同一 target 的所有转发合并到一个 ssh 进程（多个 -L/-R 共用一条连接）
+* 每个转发经过一个本地中继计数：-L 由中继监听用户端口并转发到 ssh 的内部
+  端口，-R 由 ssh 转发到中继的内部端口再由中继连接目标；中继在 ssh 重启
+  期间保持监听，端口不会变化
+* ssh 进程退出后按指数退避自动重启
+* 定期经由已建立的连接执行 `true` 测量往返延迟
+* 运行状态（状态、重启次数、延迟、收发字节数）写入 ~/.cache/xssh/tunnels/state.json
+"""
+
+import csv
+import hashlib
+import json
+import os
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from xssh.models import HostInfo
+from xssh.parser import TargetParser
+from xssh.finder import HostFinder, MultipleUsersError
+from xssh.jump import ControlMaster, JumpChain, JumpResolver, SSH_OPTIONS
+from xssh.inventory import cache_dir
+from xssh import daemon
+from xssh.exceptions import XSSHError
+
+TUNNELS_PATH = Path.home() / ".ssh" / "tunnels.csv"
+FIELDS = ["name", "target", "type", "listen", "dest"]
+
+BACKOFF_MIN = 1.0
+BACKOFF_MAX = 60.0
+# ssh 进程持续运行超过该时间后重置退避
+STABLE_AFTER = 60.0
+PROBE_INTERVAL = 30.0
+STATE_INTERVAL = 2.0
+BUFFER_SIZE = 65536
+
+
+def state_dir() -> Path:
+    return cache_dir() / "tunnels"
+
+
+def _split_hostport(value: str, default_host: Optional[str] = None) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    if not host:
+        if default_host is None:
+            raise XSSHError(f"地址格式错误，应为 host:port: {value}")
+        host = default_host
+    try:
+        port_num = int(port)
+    except ValueError:
+        raise XSSHError(f"端口号必须为整数: {value}")
+    if not 1 <= port_num <= 65535:
+        raise XSSHError(f"端口号超出范围 (1-65535): {value}")
+    return host, port_num
+
+
+@dataclass
+class TunnelSpec:
+    """隧道声明"""
+    name: str
+    target: str
+    type: str     # "L" 本地转发 / "R" 远程转发
+    listen: str   # [bind:]port
+    dest: str     # host:port
+
+    @classmethod
+    def from_forward(cls, name: str, target: str, type_: str, spec: str) -> "TunnelSpec":
+        """从 ssh 风格的 [bind:]port:host:hostport 创建"""
+        parts = spec.split(":")
+        if len(parts) == 3:
+            listen, dest = parts[0], f"{parts[1]}:{parts[2]}"
+        elif len(parts) == 4:
+            listen, dest = f"{parts[0]}:{parts[1]}", f"{parts[2]}:{parts[3]}"
+        else:
+            raise XSSHError(f"转发格式错误，应为 [bind:]port:host:hostport: {spec}")
+        tunnel = cls(name=name, target=target, type=type_, listen=listen, dest=dest)
+        tunnel.validate()
+        return tunnel
+
+    def validate(self):
+        if not self.name:
+            raise XSSHError("隧道名称不能为空")
+        if self.type not in ("L", "R"):
+            raise XSSHError(f"隧道类型必须为 L 或 R: {self.type}")
+        TargetParser.parse(self.target)
+        # 格式错误时抛出 XSSHError
+        _ = self.listen_addr, self.dest_addr
+
+    @property
+    def listen_addr(self) -> Tuple[str, int]:
+        # 未指定 bind 时与 ssh 一致，只监听本机
+        return _split_hostport(self.listen, default_host="127.0.0.1")
+
+    @property
+    def dest_addr(self) -> Tuple[str, int]:
+        return _split_hostport(self.dest)
+
+    def __str__(self):
+        return f"-{self.type} {self.listen}:{self.dest} via {self.target}"
+
+
+class TunnelStore:
+    """隧道声明文件"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or TUNNELS_PATH
+
+    def load(self) -> List[TunnelSpec]:
+        if not self.path.exists():
+            return []
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            return [
+                TunnelSpec(**{k: (row.get(k) or "").strip() for k in FIELDS})
+                for row in csv.DictReader(f)
+            ]
+
+    def _save(self, tunnels: List[TunnelSpec]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".tunnels-", dir=str(self.path.parent))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(FIELDS)
+                for t in tunnels:
+                    writer.writerow([t.name, t.target, t.type, t.listen, t.dest])
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def add(self, tunnel: TunnelSpec):
+        tunnels = self.load()
+        if any(t.name == tunnel.name for t in tunnels):
+            raise XSSHError(f"已存在同名隧道: {tunnel.name}")
+        tunnels.append(tunnel)
+        self._save(tunnels)
+
+    def remove(self, name: str):
+        tunnels = self.load()
+        remaining = [t for t in tunnels if t.name != name]
+        if len(remaining) == len(tunnels):
+            raise XSSHError(f"未找到隧道: {name}")
+        self._save(remaining)
+
+
+@dataclass
+class TrafficStats:
+    """单个隧道的流量统计"""
+    bytes_in: int = 0
+    bytes_out: int = 0
+    connections: int = 0
+    active: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, attr: str, n: int):
+        with self.lock:
+            setattr(self, attr, getattr(self, attr) + n)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "connections": self.connections,
+                "active": self.active,
+            }
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Relay:
+    """计数中继：把 listen 上的连接转发到 upstream"""
+
+    def __init__(self, listen: Tuple[str, int], upstream: Tuple[str, int], stats: TrafficStats):
+        self.upstream = upstream
+        self.stats = stats
+        self._sock = socket.create_server(listen, reuse_port=False)
+        self._closed = False
+
+    @property
+    def port(self) -> int:
+        return self._sock.getsockname()[1]
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def close(self):
+        self._closed = True
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(client,), daemon=True).start()
+
+    def _handle(self, client: socket.socket):
+        try:
+            upstream = socket.create_connection(self.upstream, timeout=10)
+            upstream.settimeout(None)
+        except OSError:
+            client.close()
+            return
+
+        self.stats.add("connections", 1)
+        self.stats.add("active", 1)
+        t = threading.Thread(
+            target=self._pump, args=(upstream, client, "bytes_in"), daemon=True
+        )
+        t.start()
+        self._pump(client, upstream, "bytes_out")
+        t.join()
+        self.stats.add("active", -1)
+        client.close()
+        upstream.close()
+
+    def _pump(self, src: socket.socket, dst: socket.socket, counter: str):
+        try:
+            while True:
+                data = src.recv(BUFFER_SIZE)
+                if not data:
+                    break
+                dst.sendall(data)
+                self.stats.add(counter, len(data))
+        except OSError:
+            pass
+        finally:
+            try:
+                dst.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+
+class TunnelGroup:
+    """同一 target 上的所有转发，对应一个 ssh 进程"""
+
+    def __init__(self, host_info: HostInfo, tunnels: List[TunnelSpec], jump: JumpChain):
+        self.host_info = host_info
+        self.tunnels = tunnels
+        self.jump = jump
+        self.stats: Dict[str, TrafficStats] = {t.name: TrafficStats() for t in tunnels}
+        self.relays: List[Relay] = []
+        self.forwards: List[str] = []
+        self.process: Optional[subprocess.Popen] = None
+        self.status = "starting"
+        self.restarts = 0
+        self.latency_ms: Optional[float] = None
+        self.last_probe = 0.0
+        self.last_error = ""
+        self.started_at = 0.0
+        self.next_start = 0.0
+        self.backoff = BACKOFF_MIN
+
+        digest = hashlib.sha1(str(host_info).encode("utf-8")).hexdigest()[:16]
+        self.control_path = state_dir() / f"{digest}.sock"
+        self.log_path = state_dir() / f"{digest}.log"
+
+    def setup(self):
+        """绑定中继端口（整个生命周期内保持不变）"""
+        for t in self.tunnels:
+            stats = self.stats[t.name]
+            if t.type == "L":
+                internal = _free_port()
+                relay = Relay(t.listen_addr, ("127.0.0.1", internal), stats)
+                dest_host, dest_port = t.dest_addr
+                self.forwards += ["-L", f"127.0.0.1:{internal}:{dest_host}:{dest_port}"]
+            else:
+                relay = Relay(("127.0.0.1", 0), t.dest_addr, stats)
+                bind, port = t.listen_addr
+                self.forwards += ["-R", f"{bind}:{port}:127.0.0.1:{relay.port}"]
+            self.relays.append(relay)
+
+    def _command(self) -> List[str]:
+        proxy_command = self.jump.prepare(self.host_info)
+        h = self.jump.reveal(self.host_info)
+        cmd = [
+            "sshpass", "-p", h.password,
+            "ssh", "-N",
+            "-o", "ExitOnForwardFailure=yes",
+            "-o", "ServerAliveInterval=15",
+            "-o", "ServerAliveCountMax=3",
+            "-o", "ControlMaster=yes",
+            "-o", f"ControlPath={self.control_path}",
+            *SSH_OPTIONS,
+            "-p", str(h.port),
+        ]
+        if proxy_command:
+            cmd += ["-o", f"ProxyCommand={proxy_command}"]
+        return cmd + self.forwards + [f"{h.user}@{h.host}"]
+
+    def start_relays(self):
+        for relay in self.relays:
+            relay.start()
+
+    def start(self):
+        try:
+            cmd = self._command()
+            # 上一个 ssh 进程异常退出时可能留下 socket 文件，会导致无法复用
+            ControlMaster.remove_socket(self.control_path)
+            with open(self.log_path, "ab") as log:
+                self.process = subprocess.Popen(
+                    cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=log
+                )
+            self.status = "up"
+            self.started_at = time.monotonic()
+        except Exception as e:
+            # 任何错误都只影响本分组，按退避计划重试
+            self.last_error = str(e) or type(e).__name__
+            self._schedule_restart()
+
+    def _schedule_restart(self):
+        self.status = "down"
+        self.process = None
+        self.next_start = time.monotonic() + self.backoff
+        self.backoff = min(self.backoff * 2, BACKOFF_MAX)
+
+    def _read_last_error(self) -> str:
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(max(0, f.seek(0, os.SEEK_END) - 4096))
+                lines = f.read().decode("utf-8", "replace").strip().splitlines()
+            return lines[-1] if lines else ""
+        except OSError:
+            return ""
+
+    def check(self):
+        """检查 ssh 进程，退出时按退避计划重启"""
+        now = time.monotonic()
+        if self.process is not None:
+            code = self.process.poll()
+            if code is None:
+                if now - self.started_at > STABLE_AFTER:
+                    self.backoff = BACKOFF_MIN
+                return
+            self.last_error = self._read_last_error() or f"ssh 退出码 {code}"
+            self.latency_ms = None
+            self._schedule_restart()
+        elif now >= self.next_start:
+            if self.status == "down":
+                self.restarts += 1
+            self.start()
+
+    def probe(self):
+        """经由已建立的连接执行 true，测量往返延迟"""
+        if self.process is None or self.process.poll() is not None:
+            return
+        h = self.host_info
+        cmd = [
+            "ssh", "-o", "ControlMaster=no", "-o", "BatchMode=yes",
+            "-o", f"ControlPath={self.control_path}",
+            "-p", str(h.port), f"{h.user}@{h.host}", "true",
+        ]
+        start = self.last_probe = time.monotonic()
+        try:
+            result = subprocess.run(
+                cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, timeout=10,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            self.latency_ms = None
+            return
+        if result.returncode == 0:
+            self.latency_ms = round((time.monotonic() - start) * 1000, 1)
+
+    def stop(self):
+        for relay in self.relays:
+            relay.close()
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    def state(self) -> dict:
+        return {
+            "status": self.status,
+            "pid": self.process.pid if self.process else None,
+            "restarts": self.restarts,
+            "latency_ms": self.latency_ms,
+            "last_error": self.last_error,
+            "tunnels": {name: s.snapshot() for name, s in self.stats.items()},
+        }
+
+
+class TunnelSupervisor:
+    """监督所有隧道分组"""
+
+    def __init__(self, groups: List[TunnelGroup]):
+        self.groups = groups
+        self.running = True
+        self.state_path = state_dir() / "state.json"
+
+    def _probe_loop(self):
+        while self.running:
+            now = time.monotonic()
+            for group in self.groups:
+                # 刚（重新）建立的连接尽快测一次，之后按固定间隔
+                if group.latency_ms is None or now - group.last_probe >= PROBE_INTERVAL:
+                    group.probe()
+            time.sleep(1)
+
+    def write_state(self):
+        data = {
+            "pid": os.getpid(),
+            "updated": time.time(),
+            "groups": {str(g.host_info): g.state() for g in self.groups},
+        }
+        fd, tmp = tempfile.mkstemp(prefix=".state-", dir=str(self.state_path.parent))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.state_path)
+
+    def setup(self):
+        """绑定所有中继端口（在 fork 之前执行，端口冲突可以直接报错）"""
+        state_dir().mkdir(parents=True, exist_ok=True, mode=0o700)
+        try:
+            for group in self.groups:
+                group.setup()
+        except OSError as e:
+            for group in self.groups:
+                group.stop()
+            raise XSSHError(f"无法监听端口: {e}")
+
+    def run(self):
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "running", False))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "running", False))
+        for group in self.groups:
+            group.start_relays()
+            group.start()
+        threading.Thread(target=self._probe_loop, daemon=True).start()
+
+        last_write = 0.0
+        try:
+            while self.running:
+                for group in self.groups:
+                    group.check()
+                if time.monotonic() - last_write >= STATE_INTERVAL:
+                    self.write_state()
+                    last_write = time.monotonic()
+                time.sleep(0.5)
+        finally:
+            for group in self.groups:
+                group.stop()
+            try:
+                self.state_path.unlink()
+            except OSError:
+                pass
+
+
+def _lock_path() -> Path:
+    return state_dir() / "supervisor.lock"
+
+
+def acquire_lock() -> int:
+    """
+    获取监督进程锁并写入当前 pid，返回需要在进程生命周期内保持打开的 fd
+
+    锁在进程退出（包括崩溃）时由内核释放，因此持有锁即说明进程仍在运行，
+    不会因为 pid 被其他进程复用而误判。
+    """
+    import fcntl
+
+    state_dir().mkdir(parents=True, exist_ok=True, mode=0o700)
+    fd = os.open(_lock_path(), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        raise XSSHError("隧道管理进程已在运行，请先执行 xssh tunnel stop")
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode("ascii"))
+    return fd
+
+
+def locked_pid() -> Optional[int]:
+    """返回持有监督进程锁的 pid，没有进程持有锁时返回 None"""
+    import fcntl
+
+    try:
+        fd = os.open(_lock_path(), os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except OSError:
+            # 锁被持有：文件中的 pid 即为监督进程
+            try:
+                return int(os.read(fd, 32).decode("ascii"))
+            except ValueError:
+                return None
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return None
+    finally:
+        os.close(fd)
+
+
+def read_state() -> Optional[dict]:
+    """读取监督进程状态，进程未运行时返回 None"""
+    pid = locked_pid()
+    if pid is None:
+        return None
+    try:
+        with open(state_dir() / "state.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("pid") == pid:
+            return data
+    except (IOError, OSError, ValueError):
+        pass
+    # 刚启动还没有写入状态，或状态文件来自之前异常退出的进程
+    return {"pid": pid, "updated": None, "groups": {}}
+
+
+def build_groups(tunnels: List[TunnelSpec], hosts_manager, reveal) -> List[TunnelGroup]:
+    """按 target 分组，并预先解密目标和跳板机的密码（后台进程无法交互输入主密码）"""
+    finder = HostFinder(hosts_manager)
+    resolver = JumpResolver(hosts_manager)
+    revealed: Dict[str, HostInfo] = {}
+    grouped: Dict[str, Tuple[HostInfo, List[TunnelSpec]]] = {}
+
+    for t in tunnels:
+        target = TargetParser.parse(t.target)
+        try:
+            host_info, port = finder.find(target)
+        except MultipleUsersError:
+            raise XSSHError(f"隧道 {t.name}: 主机 {target.host} 有多个用户，请使用 user@host 指定")
+        if port != host_info.port:
+            host_info = replace(host_info, port=port)
+
+        key = str(host_info)
+        if key not in grouped:
+            for h in resolver.chain(host_info) + [host_info]:
+                if str(h) not in revealed:
+                    revealed[str(h)] = reveal(h)
+            grouped[key] = (host_info, [])
+        grouped[key][1].append(t)
+
+    def cached_reveal(host_info: HostInfo) -> HostInfo:
+        try:
+            return revealed[str(host_info)]
+        except KeyError:
+            raise XSSHError(f"未预先解密 {host_info} 的密码")
+
+    jump = JumpChain(hosts_manager, cached_reveal)
+    return [TunnelGroup(h, specs, jump) for h, specs in grouped.values()]
+
+
+def start_supervisor(groups: List[TunnelGroup], foreground: bool = False) -> int:
+    """启动监督进程，返回其 pid"""
+    state = read_state()
+    if state:
+        raise XSSHError(f"隧道管理进程已在运行 (pid {state['pid']})，请先执行 xssh tunnel stop")
+
+    supervisor = TunnelSupervisor(groups)
+    supervisor.setup()
+    if foreground:
+        lock_fd = acquire_lock()
+        try:
+            supervisor.run()
+        finally:
+            os.close(lock_fd)
+        return os.getpid()
+
+    def main(ready):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        # 在守护进程中（最后一次 fork 之后）取锁，锁由该进程持有至退出
+        acquire_lock()
+        ready()
+        supervisor.run()
+
+    return daemon.spawn(main)
+
+
+def stop_supervisor() -> bool:
+    """向持有锁的监督进程发送 SIGTERM，没有进程持有锁时返回 False"""
+    pid = locked_pid()
+    if pid is None:
+        return False
+    os.kill(pid, signal.SIGTERM)
+    return True